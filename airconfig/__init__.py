@@ -0,0 +1,70 @@
+"""
+A configuration tool for the Air for Steam skin.
+
+Importing the package does no work: the submodules, and the names below,
+are only loaded the first time they are used.
+"""
+import sys
+
+__version__ = '0.1.0'
+
+# the public names and the submodules that define them
+_EXPORTS = {
+    'Catalog': 'catalog',
+    'get_default_dir': 'catalog',
+    'get_skins': 'catalog',
+    'is_air_skin': 'catalog',
+    'air_fingerprint': 'catalog',
+    'get_themes': 'catalog',
+    'get_colors': 'catalog',
+    'Document': 'document',
+    'SkinFiles': 'document',
+    'load_document': 'document',
+    'save_document': 'document',
+    'patch_scalar': 'document',
+    'copy_dir': 'files',
+    'move_file': 'files',
+    'state_dir': 'files',
+    'apply_profile': 'settings',
+    'get_theme': 'settings',
+    'PROFILE_SETTINGS': 'settings',
+    'SkinSettings': 'model',
+    'find_skins': 'fleet',
+    'apply_fleet': 'fleet',
+    'Recorder': 'instrument',
+    'enable_instrumentation': 'instrument',
+    'write_report': 'instrument',
+}
+
+__all__ = sorted(_EXPORTS) + ['__version__']
+
+
+def __getattr__(name: str):
+    """
+    Loads a public name from its submodule on first use
+
+    :param name: The attribute being looked up
+    :return: The value of the name
+    """
+    import importlib
+
+    if name not in _EXPORTS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module('.' + _EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+if sys.version_info < (3, 7):
+    import types
+
+    class _LazyModule(types.ModuleType):
+        """
+        The package, on Pythons older than 3.7, which don't look up a
+        __getattr__ of the module itself
+        """
+
+        def __getattr__(self, name: str):
+            return globals()['__getattr__'](name)
+
+    sys.modules[__name__].__class__ = _LazyModule
@@ -0,0 +1,179 @@
+"""
+Building preconfigured variants of a skin.  Each variant is a skin of its
+own, cloned from a base skin and configured with a profile, whose files
+share their data with the base's until the editors change them.
+"""
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from . import files, instrument
+from .catalog import is_air_skin
+from .model import SkinSettings
+from .settings import apply_profile
+from .store import Store
+
+# how variants share the files of the base skin: 'hardlink', 'reflink' or 'copy'
+BUILD_LINKS = 'hardlink'
+
+
+def load_matrix(path: Path) -> dict:
+    """
+    Loads the variants to build from a JSON file of variant names to profiles
+
+    :param path: Path to the JSON file
+    :return: A dict of variant names to profiles
+    """
+    with path.open() as file:
+        variants = json.load(file)
+    if not isinstance(variants, dict) or not all(isinstance(x, dict) for x in variants.values()):
+        raise ValueError('The variants must be an object of names to profiles')
+    for name in variants:
+        if not name or name.startswith('.') or os.sep in name or (os.altsep and os.altsep in name):
+            raise ValueError('Invalid variant name: {}'.format(name))
+    return variants
+
+
+def _is_state(rel: str) -> bool:
+    """
+    Checks if a file of the skin is some of the configurator's state, which
+    is small and written in place, so each variant needs a copy of its own
+
+    :param rel: The path of the file relative to the skin root
+    :return: If the file must be copied rather than shared
+    """
+    return rel.startswith('.air-config' + os.sep) and rel.endswith('.json')
+
+
+def _rebase_copies(base: Path, variant: Path):
+    """
+    Moves the manifest of theme copies over to a variant.  It holds the paths
+    of the files copied and of their sources in the base's themes, which the
+    variant's files share the stats of, so the theme files the variant keeps
+    aren't hashed again.
+
+    :param base: Path to the base skin root
+    :param variant: Path to the variant skin root
+    :return: returns nothing
+    """
+    manifest = variant / '.air-config' / 'copies.json'
+    if not manifest.exists():
+        return
+    with manifest.open() as file:
+        entries = json.load(file)
+    prefixes = {str(base) + os.sep, str(base.resolve()) + os.sep}
+
+    def rebase(path):
+        prefix = next((x for x in prefixes if path.startswith(x)), None)
+        return os.path.join(str(variant), path[len(prefix):]) if prefix else path
+
+    rebased = {}
+    for path, entry in entries.items():
+        if isinstance(entry[0], str):
+            entry = [rebase(entry[0])] + entry[1:]
+        rebased[rebase(path)] = entry
+    with manifest.open('w') as file:
+        json.dump(rebased, file)
+
+
+def _build_target(base: Path, current: SkinSettings, name: str, profile: dict, out_dir: Path, mode: str,
+                  copy_workers: int, theme_links: str, store: Path, record: bool) -> tuple:
+    """
+    Builds one variant, in a worker process.  A variant built before is set
+    aside until the new one is complete, and put back if the build fails.
+
+    :param base: Path to the base skin root
+    :param current: The settings of the base, or None if they couldn't be read
+    :param name: The name of the variant, and of its directory
+    :param profile: A dict of setting names to values
+    :param out_dir: Path to the directory the variants are built in
+    :param mode: How to share the files of the base, see BUILD_LINKS
+    :param copy_workers: The number of files to copy at once
+    :param theme_links: How to install themes, see files.THEME_LINKS
+    :param store: Path to the store to link files from, or None to copy them
+    :param record: If the operations should be recorded
+    :return: A tuple of the name, the seconds taken, the files shared and copied from the base,
+        the number of files changed by the profile, the error or None, and the recorded totals or None
+    """
+    files.COPY_WORKERS = copy_workers
+    files.THEME_LINKS = theme_links
+    files.STORE = Store(store) if store is not None else None
+    recorder = instrument.enable_instrumentation() if record else None
+
+    start = time.perf_counter()
+    target = out_dir / name
+    old = out_dir / '.{}.old'.format(name)
+    shared = copied = 0
+    changed, error = [], None
+    try:
+        if old.exists():
+            shutil.rmtree(str(old))
+        if target.exists():
+            os.replace(str(target), str(old))
+        try:
+            # the variant's journal starts with its own profile
+            shared, copied = files.clone_tree(str(base), str(target), mode, {os.path.join('.air-config', 'journal')},
+                                              _is_state)
+            _rebase_copies(base, target)
+            if current is not None:
+                # the settings the base already has don't need their files read
+                profile = current.changes(SkinSettings.from_profile(profile)).to_profile()
+            changed = apply_profile(target, profile)
+        except Exception:
+            shutil.rmtree(str(target), ignore_errors=True)
+            if old.exists():
+                os.replace(str(old), str(target))
+            raise
+        if old.exists():
+            shutil.rmtree(str(old))
+    except Exception as e:
+        error = '{}: {}'.format(type(e).__name__, e)
+    totals = recorder.report()['totals'] if recorder is not None else None
+    return name, time.perf_counter() - start, shared, copied, len(changed), error, totals
+
+
+def build_variants(base: Path, variants: dict, out_dir: Path, workers: int = None, mode: str = None) -> list:
+    """
+    Builds variants of a skin at once, one process per variant, each in a
+    directory of out_dir named after it.  The files of the base are shared
+    rather than copied, so a variant only takes up the space of the files
+    its profile changes.  A failure on one variant doesn't stop the others.
+
+    :param base: Path to the base skin root
+    :param variants: A dict of variant names to profiles
+    :param out_dir: Path to the directory to build the variants in, outside the base
+    :param workers: The number of processes, defaults to the number of CPUs
+    :param mode: How to share the files of the base, defaults to BUILD_LINKS
+    :return: A list of (name, seconds, files shared, files copied, files changed, error or None)
+        tuples, in the order of variants
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not is_air_skin(base):
+        raise ValueError('Invalid skin - not Air')
+    if out_dir.resolve() == base.resolve() or base.resolve() in out_dir.resolve().parents:
+        raise ValueError('The variants must be built outside the base skin')
+    out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        current = SkinSettings.read(base)
+    except (IndexError, KeyError, ValueError):
+        # a setting the base has no place for; every variant applies its whole profile
+        current = None
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_build_target, base, current, name, profile, out_dir, mode or BUILD_LINKS,
+                                   files.COPY_WORKERS, files.THEME_LINKS,
+                                   files.STORE.path if files.STORE is not None else None,
+                                   instrument.recorder is not None)
+                   for name, profile in variants.items()]
+
+    results = []
+    for future in futures:
+        name, seconds, shared, copied, changed, error, totals = future.result()
+        if instrument.recorder is not None:
+            instrument.recorder.merge(totals)
+            instrument.recorder.record('target', str(out_dir / name), seconds)
+        results.append((name, seconds, shared, copied, changed, error))
+    return results
@@ -0,0 +1,169 @@
+"""
+Discovery of skins and of the themes and colors they provide.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+
+def get_default_dir() -> Path:
+    """
+    Gets the default skins directory for the operating system.
+
+    :return: A Path object with the full path to the skins directory
+    """
+    if sys.platform == 'linux':
+        skins_dir = Path.expanduser(Path('~/.local/share/Steam/skins/'))
+    elif sys.platform == 'posix':
+        skins_dir = Path.expanduser(
+            Path('~/Library/Application Support/Steam/Steam.AppBundle/Steam/Contents/MacOS/skins/'))
+    elif sys.platform == 'win32':
+        skins_dir = Path('%ProgramFiles(x86)%\\Steam\\Skins')
+    else:
+        skins_dir = None
+
+    return skins_dir
+
+
+class Catalog:
+    """
+    A cache of what is installed: the skins in a skins directory, whether
+    each is Air and which release, and the themes and colors it provides.
+
+    Each entry is stored with the mtimes of the paths it was read from, and
+    is only read again once one of those changes.  The catalog is persisted
+    to a small JSON file, so later runs don't scan the directories either.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries = None
+
+    def lookup(self, kind: str, key: Path, paths: list, read):
+        """
+        Gets an entry, reading it again if any of its paths changed
+
+        :param kind: The kind of entry, such as 'themes'
+        :param key: The skin or directory the entry belongs to
+        :param paths: The Paths whose mtimes the entry depends on
+        :param read: A function returning the up to date value
+        :return: The value of the entry
+        """
+        if self._entries is None:
+            try:
+                with self.path.open() as file:
+                    self._entries = json.load(file)
+            except (OSError, ValueError):
+                self._entries = {}
+
+        stamps = []
+        for path in paths:
+            try:
+                stamps.append(path.stat().st_mtime_ns)
+            except FileNotFoundError:
+                stamps.append(None)
+
+        name = '{}:{}'.format(kind, key.resolve())
+        entry = self._entries.get(name)
+        if entry is None or entry[0] != stamps:
+            entry = [stamps, read()]
+            self._entries[name] = entry
+            self.save()
+        return entry[1]
+
+    def save(self):
+        """
+        Writes out the catalog, replacing the old file in one step
+
+        :return: returns nothing
+        """
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_name('{}.{}.tmp'.format(self.path.name, os.getpid()))
+            with temp.open('w') as file:
+                json.dump(self._entries, file)
+            os.replace(str(temp), str(self.path))
+        except OSError:
+            # the cache is only an optimization
+            pass
+
+
+CATALOG = Catalog(Path(os.environ.get('XDG_CACHE_HOME', '~/.cache')).expanduser() / 'air-config' / 'catalog.json')
+
+
+def get_skins(skins_dir: Path) -> list:
+    """
+    Gets the skins installed in a skins directory
+
+    :param skins_dir: Path to the skins directory
+    :return: A sorted list of Paths to the skin roots
+    """
+    names = CATALOG.lookup('skins', skins_dir, [skins_dir],
+                           lambda: sorted(x.name for x in skins_dir.iterdir() if x.is_dir()))
+    return [skins_dir / x for x in names]
+
+
+def _read_release(skin: Path) -> list:
+    """
+    Reads whether a skin is Air, and a fingerprint of the release
+
+    :param skin: A Path to the skin root
+    :return: A list of whether the skin is Air and the hash of its changelog link
+    """
+    import hashlib
+
+    try:
+        changelog = (skin / 'Changelog.url').read_bytes()
+    except FileNotFoundError:
+        return [False, None]
+    return [b"Air-for-Steam" in changelog, hashlib.sha1(changelog).hexdigest()]
+
+
+def is_air_skin(skin: Path) -> bool:
+    """
+    Checks if the given skin is in fact Air
+
+    :param skin: A Path to the skin root
+    :return: If the skin is Air
+    """
+    return CATALOG.lookup('release', skin, [skin / 'Changelog.url'], lambda: _read_release(skin))[0]
+
+
+def air_fingerprint(skin: Path) -> str:
+    """
+    Identifies the release of Air installed in a skin
+
+    :param skin: A Path to the skin root
+    :return: A hash of the skin's changelog link, or None if it has none
+    """
+    return CATALOG.lookup('release', skin, [skin / 'Changelog.url'], lambda: _read_release(skin))[1]
+
+
+def get_themes(skin: Path) -> list:
+    """
+    Gets the themes available in the skin
+
+    :param skin: Path to the skin root
+    :return: A list of theme names
+    """
+    themes = skin / '+Extras' / 'Themes'
+    return CATALOG.lookup('themes', skin, [themes],
+                          lambda: sorted(x.name for x in themes.iterdir() if x.is_dir()))
+
+
+def get_colors(skin: Path) -> list:
+    """
+    Gets the color schemes available in the skin
+
+    :param skin: Path to the skin root
+    :return: A list of color names
+    """
+    colors = skin / 'Resource' / 'colors'
+
+    def read():
+        found = sorted(x.stem for x in colors.iterdir() if x.is_file())
+        found += sorted(x.stem for x in (colors / 'user').iterdir() if x.is_file())
+        return found
+
+    return CATALOG.lookup('colors', skin, [colors, colors / 'user'], read)
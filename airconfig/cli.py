@@ -0,0 +1,445 @@
+"""
+The command line.  Only the modules needed by the chosen mode are imported,
+so `--version` and `--list-skins` return without loading the editors.
+"""
+import sys
+from pathlib import Path
+
+from . import __version__
+
+
+def load_profile(path: Path) -> dict:
+    """
+    Reads a JSON profile given on the command line, exiting with an error if it can't be read
+
+    :param path: Path to the profile
+    :return: A dict of setting names to values
+    """
+    import json
+
+    try:
+        with path.open() as file:
+            profile = json.load(file)
+    except (OSError, ValueError) as e:
+        print('Can\'t read the profile {}: {}'.format(path, e))
+        exit(1)
+    if not isinstance(profile, dict):
+        print('The profile {} must be a JSON object of setting names to values'.format(path))
+        exit(1)
+    return profile
+
+
+def main(argv: list = None):
+    """
+    Runs air-config with the given command line arguments
+
+    :param argv: The arguments, defaults to the ones the program was started with
+    :return: returns nothing
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='air-config', description='A configuration tool for the Air for Steam skin.')
+    parser.add_argument('--version', action='version', version='%(prog)s ' + __version__)
+    parser.add_argument('--skins-dir', type=Path,
+                        help='path to the skins directory (default: the Steam skins directory for this system)')
+    parser.add_argument('--list-skins', action='store_true', help='list the skins in the skins directory, then exit')
+    parser.add_argument('--skin', type=Path, help='path to the skin to configure, instead of choosing one')
+    parser.add_argument('--plain', action='store_true',
+                        help='print the menus and read choices by number, instead of drawing them on the terminal')
+    parser.add_argument('--apply', metavar='PROFILE', type=Path,
+                        help='apply a JSON profile to the skin without prompting, then exit')
+    parser.add_argument('--install', metavar='ARCHIVE', type=Path,
+                        help='install a release of Air from a zip or tar archive into the skins directory, or '
+                             'upgrade --skin to it, keeping its settings or applying --apply instead, then exit')
+    parser.add_argument('--build', metavar=('VARIANTS', 'OUT_DIR'), type=Path, nargs=2,
+                        help='build a copy of --skin in OUT_DIR for each variant of the JSON file VARIANTS, an '
+                             'object of names to profiles, then exit')
+    parser.add_argument('--build-links', choices=['hardlink', 'reflink', 'copy'], default='hardlink',
+                        help='how the variants share the files of --skin they don\'t change (default: %(default)s)')
+    parser.add_argument('--status', action='store_true',
+                        help='print the current value of every setting of the skin, or of the fleet, then exit')
+    parser.add_argument('--verify', metavar='PROFILE', type=Path,
+                        help='print the settings of --skin, or of the fleet, that differ from a JSON profile, '
+                             'then exit')
+    parser.add_argument('--json', action='store_true',
+                        help='print the status as JSON, in the form of a profile, or the differences as JSON')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running, and apply the settings of the --apply profile, or of the one last '
+                             'watched, again whenever Steam or an update rewrites the files of --skin')
+    parser.add_argument('--watch-poll', metavar='SECONDS', type=float,
+                        help='check the files for changes every SECONDS instead of being notified of them')
+    parser.add_argument('--history', action='store_true', help='list the edits recorded in the journal of --skin')
+    parser.add_argument('--undo', metavar='N', type=int, nargs='?', const=1,
+                        help='undo the last N edits to --skin (default: 1)')
+    parser.add_argument('--snapshot', metavar='NAME', help='name the current state of --skin, to restore it later')
+    parser.add_argument('--restore', metavar='NAME', help='undo every edit to --skin since the snapshot NAME')
+    parser.add_argument('--fleet', metavar='PATTERN', nargs='+',
+                        help='apply the profile to, or read the status of, every Air skin matching these paths '
+                             'or globs')
+    parser.add_argument('--fleet-workers', metavar='N', type=int,
+                        help='number of skins to configure at once in fleet and build mode '
+                             '(default: number of CPUs)')
+    parser.add_argument('--copy-workers', metavar='N', type=int, default=1,
+                        help='number of files to copy at once when installing themes (default: %(default)s)')
+    parser.add_argument('--theme-links', choices=['copy', 'symlink', 'hardlink'],
+                        help='install themes by copying their files, or by linking them into place and setting '
+                             'the files they replace aside (default: however the skin was last set up)')
+    parser.add_argument('--store', action='store_true',
+                        help='link theme and avatar files from a store shared by every skin on the host, '
+                             'instead of copying them')
+    parser.add_argument('--store-dir', type=Path,
+                        help='path to the store (default: $XDG_DATA_HOME/air-config/store)')
+    parser.add_argument('--store-dedupe', action='store_true',
+                        help='replace every file of --skin, or of the fleet, with a link to the store, then exit')
+    parser.add_argument('--store-gc', action='store_true',
+                        help='remove the stored files no skin links to any more, then exit')
+    parser.add_argument('--daemon', action='store_true',
+                        help='keep running, answering requests on a Unix socket with the skin files kept in memory')
+    parser.add_argument('--socket', metavar='PATH', type=Path,
+                        help='the socket of --daemon (default: in $XDG_RUNTIME_DIR); without --daemon, --apply and '
+                             '--status are sent to the daemon listening on it')
+    parser.add_argument('--report', metavar='FILE',
+                        help='write the timings and sizes of every file operation and edit as JSON on exit '
+                             '(- for standard output)')
+    parser.add_argument('--report-stream', metavar='FILE',
+                        help='write each file operation and edit as a JSON line as it happens (- for standard output)')
+    args = parser.parse_args(argv)
+
+    from . import catalog
+
+    skins_dir = args.skins_dir if args.skins_dir is not None else catalog.get_default_dir()
+    if args.list_skins:
+        if skins_dir is None or not skins_dir.is_dir():
+            print('No skins directory found')
+            exit(1)
+        for skin in catalog.get_skins(skins_dir):
+            print(skin)
+        exit(0)
+
+    import json
+
+    from . import files, instrument
+
+    files.COPY_WORKERS = args.copy_workers
+    files.THEME_LINKS = args.theme_links
+
+    if args.report is not None or args.report_stream is not None:
+        import atexit
+
+        stream = None
+        if args.report_stream == '-':
+            stream = sys.stdout
+        elif args.report_stream is not None:
+            stream = open(args.report_stream, 'w')
+        recorder = instrument.enable_instrumentation(stream)
+        if args.report is not None:
+            atexit.register(instrument.write_report, recorder, args.report)
+
+    if args.store or args.store_dedupe or args.store_gc:
+        from .store import Store, get_store_dir
+
+        files.STORE = Store(args.store_dir if args.store_dir is not None else get_store_dir())
+
+    if args.store_gc:
+        removed, freed = files.STORE.gc()
+        print('Removed {} unused files, {} bytes freed'.format(removed, freed))
+        exit(0)
+
+    if args.store_dedupe:
+        if args.fleet is not None:
+            from .fleet import find_skins
+
+            skins = [x for x in find_skins(args.fleet) if catalog.is_air_skin(x)]
+        elif args.skin is not None:
+            skins = [args.skin]
+        else:
+            print('--store-dedupe requires --skin or --fleet')
+            exit(1)
+        for skin in skins:
+            print('{:12} bytes freed  {}'.format(files.STORE.dedupe(str(skin)), skin))
+        exit(0)
+
+    if args.daemon:
+        from .daemon import serve
+
+        try:
+            serve(args.socket)
+        except (OSError, AttributeError) as e:
+            # AttributeError: no Unix sockets on this system
+            print(e)
+            exit(1)
+        except KeyboardInterrupt:
+            pass
+        exit(0)
+
+    if args.install is not None:
+        from .install import archive_name, install
+
+        profile = None
+        if args.apply is not None:
+            profile = load_profile(args.apply)
+        skin = args.skin
+        try:
+            if skin is None:
+                if skins_dir is None:
+                    print('No skins directory found')
+                    exit(1)
+                skin = skins_dir / archive_name(args.install)
+            upgrade = skin.exists()
+            written, unchanged, removed, conflicts, changed = install(args.install, skin, profile)
+        except (OSError, ValueError) as e:
+            print(e)
+            exit(1)
+        for conflict in conflicts:
+            print('Conflict: {}'.format(conflict))
+        print('{} {}: {} files written, {} unchanged, {} removed, {} files changed by the settings, '
+              '{} conflicts'.format('Upgraded' if upgrade else 'Installed', skin, written, unchanged, removed,
+                                    len(changed), len(conflicts)))
+        exit(1 if conflicts else 0)
+
+    if args.build is not None:
+        import time
+
+        from .build import build_variants, load_matrix
+
+        if args.skin is None:
+            print('--build requires --skin')
+            exit(1)
+        start = time.perf_counter()
+        try:
+            results = build_variants(args.skin, load_matrix(args.build[0]), args.build[1], args.fleet_workers,
+                                     args.build_links)
+        except (OSError, ValueError) as e:
+            print(e)
+            exit(1)
+        elapsed = time.perf_counter() - start
+
+        failed = 0
+        for name, seconds, shared, copied, changed, error in results:
+            if error is None:
+                print('ok    {:8.3f}s  {:5} shared  {:4} copied  {:3} changed  {}'.format(
+                    seconds, shared, copied, changed, name))
+            else:
+                failed += 1
+                print('FAIL  {:8.3f}s  {}  {}'.format(seconds, name, error))
+        print('\n{} variants, {} built, {} failed in {:.3f}s'.format(
+            len(results), len(results) - failed, failed, elapsed))
+        exit(1 if failed else 0)
+
+    if args.history or args.undo is not None or args.snapshot is not None or args.restore is not None:
+        import datetime
+
+        from . import journal
+
+        if args.skin is None:
+            print('--history, --undo, --snapshot and --restore require --skin')
+            exit(1)
+
+        if args.snapshot is not None:
+            journal.snapshot(args.skin, args.snapshot)
+            print('Snapshot {} taken'.format(args.snapshot))
+        elif args.undo is not None or args.restore is not None:
+            try:
+                undone = journal.undo(args.skin, args.undo or 0, args.restore)
+            except ValueError as e:
+                print(e)
+                exit(1)
+            print('{} edits undone'.format(undone))
+        else:
+            for number, entry in journal.history(args.skin):
+                print('{:6}  {:%Y-%m-%d %H:%M:%S}  {:14} {}'.format(
+                    number, datetime.datetime.fromtimestamp(entry['time']), entry['label'],
+                    entry['name'] if entry['name'] is not None else
+                    ', '.join([x['path'] for x in entry['files']] + list(entry.get('settings', {})))))
+        exit(0)
+
+    if args.verify is not None:
+        from .verify import verify
+
+        if args.fleet is not None:
+            from .fleet import find_skins
+
+            skins = find_skins(args.fleet)
+        elif args.skin is not None:
+            skins = [args.skin]
+        else:
+            print('--verify requires --skin or --fleet')
+            exit(1)
+        profile = load_profile(args.verify)
+
+        results = []
+        for skin in skins:
+            try:
+                if not catalog.is_air_skin(skin):
+                    raise ValueError('Invalid skin - not Air')
+                results.append((skin, verify(skin, profile), None))
+            except (OSError, ValueError) as e:
+                results.append((skin, None, '{}: {}'.format(type(e).__name__, e)))
+
+        if args.json:
+            print(json.dumps({str(skin): {'error': error} if error is not None else
+                              {name: {'expected': expected, 'found': found, 'error': failure}
+                               for name, expected, found, failure in drift}
+                              for skin, drift, error in results}, indent=2))
+        else:
+            for skin, drift, error in results:
+                if error is not None:
+                    print('FAIL   {}  {}'.format(skin, error))
+                    continue
+                print('{:6} {}'.format('DRIFT' if drift else 'ok', skin))
+                for name, expected, found, failure in drift:
+                    if failure is not None:
+                        print('       {:24}can\'t be read, {}'.format(name, failure))
+                    else:
+                        print('       {:24}{!r} instead of {!r}'.format(name, found, expected))
+        exit(1 if any(x[1] or x[2] is not None for x in results) else 0)
+
+    if args.status:
+        if args.fleet is not None:
+            from .fleet import find_skins, get_fleet_status
+
+            results = get_fleet_status(find_skins(args.fleet))
+        elif args.skin is not None and args.socket is not None:
+            from .daemon import call
+
+            try:
+                results = [(args.skin, call('status', args.socket, skin=str(args.skin.resolve())), None)]
+            except (OSError, ValueError) as e:
+                print(e)
+                exit(1)
+        elif args.skin is not None:
+            from .settings import get_status
+
+            if not catalog.is_air_skin(args.skin):
+                print('Invalid skin - not Air')
+                exit(1)
+            results = [(args.skin, get_status(args.skin), None)]
+        else:
+            print('--status requires --skin or --fleet')
+            exit(1)
+
+        if args.json and args.fleet is None:
+            print(json.dumps(results[0][1], indent=2))
+        elif args.json:
+            print(json.dumps({str(skin): status if error is None else {'error': error}
+                              for skin, status, error in results}, indent=2))
+        else:
+            indent = '  ' if args.fleet is not None else ''
+            for skin, status, error in results:
+                if args.fleet is not None:
+                    print(skin)
+                if error is not None:
+                    print('{}FAIL  {}'.format(indent, error))
+                    continue
+                for name, value in status.items():
+                    if isinstance(value, bool):
+                        value = 'on' if value else 'off'
+                    elif isinstance(value, list):
+                        value = ', '.join(value)
+                    elif value is None:
+                        value = 'default'
+                    print('{}{:24}{}'.format(indent, name, value))
+        exit(1 if any(x[2] is not None for x in results) else 0)
+
+    if args.fleet is not None:
+        import time
+
+        from .fleet import apply_fleet, find_skins
+
+        if args.apply is None:
+            print('--fleet requires --apply')
+            exit(1)
+        profile = load_profile(args.apply)
+
+        start = time.perf_counter()
+        results = apply_fleet(find_skins(args.fleet), profile, args.fleet_workers)
+        elapsed = time.perf_counter() - start
+
+        failed = 0
+        for skin, seconds, changed, error in results:
+            if error is None:
+                print('ok    {:8.3f}s  {:3} changed  {}'.format(seconds, changed, skin))
+            else:
+                failed += 1
+                print('FAIL  {:8.3f}s  {}  {}'.format(seconds, skin, error))
+        if results:
+            print('\n{} skins, {} applied, {} failed in {:.3f}s (mean {:.3f}s, slowest {:.3f}s)'.format(
+                len(results), len(results) - failed, failed, elapsed,
+                sum(x[1] for x in results) / len(results), max(x[1] for x in results)))
+        else:
+            print('No skins matched')
+        exit(1 if failed or not results else 0)
+
+    if args.watch:
+        import time
+
+        from .watch import watch
+
+        if args.skin is None:
+            print('--watch requires --skin')
+            exit(1)
+        if not catalog.is_air_skin(args.skin):
+            print('Invalid skin - not Air')
+            exit(1)
+        profile = None
+        if args.apply is not None:
+            profile = load_profile(args.apply)
+        try:
+            for names, changed, error in watch(args.skin, profile, args.watch_poll):
+                stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+                if error is not None:
+                    print('{}  {}'.format(stamp, error))
+                    continue
+                print('{}  Applied {} again, {} files changed'.format(stamp, ', '.join(names), len(changed)))
+                for path in changed:
+                    print('{}  Changed {}'.format(stamp, path))
+                sys.stdout.flush()
+        except ValueError as e:
+            print(e)
+            exit(1)
+        except KeyboardInterrupt:
+            exit(0)
+
+    if args.apply is not None:
+        if args.skin is None:
+            print('--apply requires --skin')
+            exit(1)
+        profile = load_profile(args.apply)
+        try:
+            if args.socket is not None:
+                from .daemon import call
+
+                changed = call('apply', args.socket, skin=str(args.skin.resolve()), profile=profile)
+            elif not catalog.is_air_skin(args.skin):
+                print('Invalid skin - not Air')
+                exit(1)
+            else:
+                from .settings import apply_profile
+
+                changed = apply_profile(args.skin, profile)
+        except (OSError, ValueError) as e:
+            print(e)
+            exit(1)
+        for path in changed:
+            print('Changed {}'.format(path))
+        print('Profile applied to {}, {} files changed'.format(args.skin, len(changed)))
+        exit(0)
+
+    from . import menu, screen
+
+    if not args.plain and screen.supported():
+        menu.screen = screen.Screen()
+
+    skin_dir = args.skin
+    if skin_dir is None:
+        menu.skin_dir = skins_dir
+        menu.print_header()
+        skins = catalog.get_skins(skins_dir)
+        skin_dir = skins[menu.choose_skin(skins)]
+    menu.skin_dir = skin_dir
+
+    if not catalog.is_air_skin(skin_dir):
+        print('Invalid skin - not Air')
+        exit(1)
+
+    menu.configure_skin(skin_dir)
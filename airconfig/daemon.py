@@ -0,0 +1,258 @@
+"""
+A resident process answering requests over a local Unix socket, so that
+many small changes don't each pay for starting Python, importing the
+editors and reading the skin's files.  The parsed files and the catalog
+stay in memory between requests, and a file is only read again once its
+mtime or size changes.
+
+Requests and responses are JSON objects, one per line.  A request names
+an 'op' and its parameters, for example:
+
+    {"op": "apply", "skin": "/path/to/skin", "profile": {"grid_fade": 100}}
+
+and is answered with {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+"""
+import json
+import os
+import socket
+import stat
+import tempfile
+import threading
+from pathlib import Path
+
+# seconds a client waits for the daemon to answer
+DAEMON_TIMEOUT = 60.0
+
+
+def get_socket_path() -> Path:
+    """
+    Gets the default path of the daemon's socket, private to the user
+
+    :return: A Path in the runtime directory, or in the temporary directory if there is none
+    """
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return Path(runtime) / 'air-config.sock'
+    return Path(tempfile.gettempdir()) / 'air-config-{}.sock'.format(os.getuid())
+
+
+def _skin(params: dict) -> Path:
+    """
+    Gets the skin a request is for
+
+    :param params: The request
+    :return: The Path to the skin root
+    """
+    from .catalog import is_air_skin
+
+    if 'skin' not in params:
+        raise ValueError('Missing skin')
+    skin = Path(params['skin'])
+    if not is_air_skin(skin):
+        raise ValueError('Invalid skin - not Air')
+    return skin
+
+
+class Daemon:
+    """
+    The operations the daemon offers, run one at a time since the caches
+    and the journal they use are not shared safely between threads
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.server = None
+        # set once a shutdown was asked for, to stop after answering it
+        self.stopping = False
+
+    def handle(self, request: dict) -> dict:
+        """
+        Runs a request
+
+        :param request: The request, a dict of the 'op' and its parameters
+        :return: The response
+        """
+        op = request.get('op') if isinstance(request, dict) else None
+        method = getattr(self, 'op_' + op, None) if isinstance(op, str) else None
+        if method is None:
+            return {'ok': False, 'error': 'Unknown op: {}'.format(op)}
+        try:
+            with self.lock:
+                return {'ok': True, 'result': method(request)}
+        except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+            return {'ok': False, 'error': '{}: {}'.format(type(e).__name__, e)}
+
+    def op_ping(self, params: dict) -> str:
+        """
+        Checks the daemon is running
+
+        :param params: The request, without parameters
+        :return: The version of the daemon
+        """
+        from . import __version__
+
+        return __version__
+
+    def op_skins(self, params: dict) -> list:
+        """
+        Lists the skins in a skins directory
+
+        :param params: The request, with the 'skins_dir', defaults to Steam's
+        :return: A list of the paths to the skins
+        """
+        from .catalog import get_default_dir, get_skins
+
+        skins_dir = Path(params['skins_dir']) if params.get('skins_dir') else get_default_dir()
+        if skins_dir is None or not skins_dir.is_dir():
+            raise ValueError('No skins directory found')
+        return [str(x) for x in get_skins(skins_dir)]
+
+    def op_themes(self, params: dict) -> list:
+        """
+        Lists the themes of a skin
+
+        :param params: The request, with the 'skin'
+        :return: A list of theme names
+        """
+        from .catalog import get_themes
+
+        return get_themes(_skin(params))
+
+    def op_colors(self, params: dict) -> list:
+        """
+        Lists the color schemes of a skin
+
+        :param params: The request, with the 'skin'
+        :return: A list of color names
+        """
+        from .catalog import get_colors
+
+        return get_colors(_skin(params))
+
+    def op_status(self, params: dict) -> dict:
+        """
+        Reads the current value of every setting of a skin
+
+        :param params: The request, with the 'skin'
+        :return: A dict of setting names to values, in the form of a profile
+        """
+        from .settings import get_status
+
+        return get_status(_skin(params))
+
+    def op_apply(self, params: dict) -> list:
+        """
+        Applies a profile to a skin
+
+        :param params: The request, with the 'skin' and the 'profile'
+        :return: A list of the paths of the text files that changed
+        """
+        from .settings import apply_profile
+
+        if not isinstance(params.get('profile'), dict):
+            raise ValueError('Missing profile')
+        return [str(x) for x in apply_profile(_skin(params), params['profile'])]
+
+    def op_set(self, params: dict) -> list:
+        """
+        Changes one setting of a skin, as the menus do
+
+        :param params: The request, with the 'skin', the 'setting' and its 'value'
+        :return: A list of the paths of the text files that changed
+        """
+        if 'setting' not in params or 'value' not in params:
+            raise ValueError('Missing setting or value')
+        return self.op_apply({'skin': params.get('skin'), 'profile': {params['setting']: params['value']}})
+
+    def op_shutdown(self, params: dict) -> bool:
+        """
+        Stops the daemon once the request is answered
+
+        :param params: The request, without parameters
+        :return: True
+        """
+        self.stopping = True
+        return True
+
+
+def serve(path: Path = None):
+    """
+    Runs the daemon until it is asked to shut down or interrupted
+
+    :param path: The path of the socket, defaults to get_socket_path()
+    :return: returns nothing
+    """
+    import socketserver
+
+    path = path if path is not None else get_socket_path()
+    if os.path.lexists(str(path)):
+        if not stat.S_ISSOCK(path.lstat().st_mode):
+            raise OSError('{} exists and is not a socket'.format(path))
+        # left behind by a daemon that didn't exit cleanly, unless one is still answering on it
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(path))
+                raise OSError('A daemon is already listening on {}'.format(path))
+            except ConnectionRefusedError:
+                path.unlink()
+
+    daemon = Daemon()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line.decode())
+                except ValueError as e:
+                    response = {'ok': False, 'error': 'Invalid request: {}'.format(e)}
+                else:
+                    response = daemon.handle(request)
+                self.wfile.write(json.dumps(response).encode() + b'\n')
+                self.wfile.flush()
+                if daemon.stopping:
+                    threading.Thread(target=daemon.server.shutdown).start()
+                    return
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    # only the user may connect
+    umask = os.umask(0o077)
+    try:
+        daemon.server = Server(str(path), Handler)
+    finally:
+        os.umask(umask)
+    try:
+        daemon.server.serve_forever()
+    finally:
+        daemon.server.server_close()
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def call(op: str, path: Path = None, **params):
+    """
+    Sends a request to a running daemon
+
+    :param op: The operation, such as 'status' or 'apply'
+    :param path: The path of the socket, defaults to get_socket_path()
+    :param params: The parameters of the operation
+    :return: The result of the operation
+    """
+    path = path if path is not None else get_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(DAEMON_TIMEOUT)
+        sock.connect(str(path))
+        sock.sendall(json.dumps(dict(params, op=op)).encode() + b'\n')
+        with sock.makefile('rb') as file:
+            line = file.readline()
+    if not line:
+        raise OSError('The daemon closed the connection')
+    response = json.loads(line.decode())
+    if not response['ok']:
+        raise ValueError(response['error'])
+    return response['result']
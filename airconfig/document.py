@@ -0,0 +1,495 @@
+"""
+Parsing, caching and editing of the skin's text files.
+"""
+import mmap
+import os
+import re
+import time
+from pathlib import Path
+
+from . import instrument
+
+
+# key=value pairs, with the value optionally quoted
+_PROPERTY = re.compile(r'([\w.:\-]+)\s*=\s*("[^"]*"|[^\s{}]+)')
+
+
+# key value pairs, as used by .styles and config.ini
+_KEY_VALUE = re.compile(r'^([\w.:\-]+)\s+("[^"]*"|[^\s{}"]+)$')
+
+
+_QUOTED = re.compile(r'"[^"]*"')
+
+
+# what each line of text declares, shared by every document, so indexing a
+# file again after an edit only parses the lines that changed
+_lines = {}
+
+# the number of lines _lines is cleared at, to bound its memory
+LINE_CACHE_SIZE = 200000
+
+
+def _parse_line(line: str) -> tuple:
+    """
+    Parses what a line declares
+
+    :param line: The line
+    :return: A tuple of the index keys of the blocks, properties and controls it declares, and
+        of the braces that open and close blocks on it, in order
+    """
+    text = line.strip()
+    comment = text.startswith('//')
+    text = text.lstrip('/').strip()
+    bare = _QUOTED.sub('""', text)
+    keys = []
+
+    brace = bare.find('{')
+    if brace > 0:
+        keys.append(('block', ' '.join(bare[:brace].split())))
+
+    for key, value in _PROPERTY.findall(text):
+        keys.append(('prop', key))
+        if key == 'control':
+            keys.extend(('control', name) for name in value.split(','))
+
+    if brace == -1 and '=' not in bare:
+        match = _KEY_VALUE.match(text)
+        if match:
+            keys.append(('prop', match.group(1)))
+
+    # commented out lines don't count towards the structure
+    braces = ''
+    if not comment and ('{' in bare or '}' in bare):
+        braces = ''.join(c for c in bare if c in '{}')
+    return tuple(keys), braces
+
+
+class Document:
+    """
+    A parsed .styles, .layout or config.ini file.
+
+    The lines are kept verbatim, so the file is written back untouched apart
+    from the edits made to it.  Alongside them is an index of the blocks,
+    properties and controls each line declares, and of where each block
+    ends.  The index is built on the first lookup, and again on the first
+    lookup after an edit.
+    """
+
+    def __init__(self, lines: list):
+        self.lines = lines
+        self._index = None
+        self._ends = None
+        self._parents = None
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __getitem__(self, item):
+        return self.lines[item]
+
+    def __setitem__(self, item, value):
+        self.lines[item] = value
+        self._index = None
+
+    def __delitem__(self, item):
+        del self.lines[item]
+        self._index = None
+
+    def pop(self, idx: int) -> str:
+        self._index = None
+        return self.lines.pop(idx)
+
+    def copy(self) -> 'Document':
+        """
+        Copies the document, sharing the index until either copy is edited
+
+        :return: A new Document
+        """
+        doc = Document(list(self.lines))
+        doc._index, doc._ends, doc._parents = self._index, self._ends, self._parents
+        return doc
+
+    def _build(self):
+        """
+        Parses the lines into the index
+
+        :return: returns nothing
+        """
+        index = {}
+        ends = {}
+        parents = []
+        stack = []
+
+        if len(_lines) > LINE_CACHE_SIZE:
+            _lines.clear()
+        for i, line in enumerate(self.lines):
+            parsed = _lines.get(line)
+            if parsed is None:
+                parsed = _lines[line] = _parse_line(line)
+            keys, braces = parsed
+            parents.append(stack[-1] if stack else -1)
+
+            for key in keys:
+                index.setdefault(key, []).append(i)
+            for c in braces:
+                if c == '{':
+                    stack.append(i)
+                elif stack:
+                    ends[stack.pop()] = i
+
+        self._index, self._ends, self._parents = index, ends, parents
+
+    def find_all(self, kind: str, name: str, start: int = 0, end: int = None) -> list:
+        """
+        Finds the lines declaring a block, property or control
+
+        :param kind: One of 'block', 'prop' or 'control'
+        :param name: The block selector, property key or control name
+        :param start: The first line to search
+        :param end: The last line to search, or None for the end of the file
+        :return: A list of line numbers, in order
+        """
+        if self._index is None:
+            self._build()
+        end = len(self.lines) if end is None else end
+        return [i for i in self._index.get((kind, name), []) if start <= i <= end]
+
+    def find(self, kind: str, name: str, start: int = 0, end: int = None) -> int:
+        """
+        Finds the first line declaring a block, property or control
+
+        :param kind: One of 'block', 'prop' or 'control'
+        :param name: The block selector, property key or control name
+        :param start: The first line to search
+        :param end: The last line to search, or None for the end of the file
+        :return: The line number
+        """
+        found = self.find_all(kind, name, start, end)
+        if not found:
+            raise ValueError('{} {} not found'.format(kind, name))
+        return found[0]
+
+    def block_end(self, idx: int) -> int:
+        """
+        Finds the line closing the block opened on the given line
+
+        :param idx: The line opening the block
+        :return: The line number of the closing brace
+        """
+        if self._index is None:
+            self._build()
+        if idx not in self._ends:
+            raise ValueError('No block opened on line {}'.format(idx + 1))
+        return self._ends[idx]
+
+    def parent(self, idx: int) -> int:
+        """
+        Finds the innermost block containing the given line
+
+        :param idx: The line number
+        :return: The line opening the block, or -1 at the top level
+        """
+        if self._index is None:
+            self._build()
+        return self._parents[idx]
+
+
+# parsed files, keyed by path, with the (mtime, size) they were parsed at
+_documents = {}
+
+
+def load_document(path: Path) -> Document:
+    """
+    Loads a parsed file, only reading it if it has changed since last loaded
+
+    :param path: The path of the file
+    :return: A Document that may be edited freely
+    """
+    start = time.perf_counter()
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _documents.get(path)
+    if cached is None or cached[0] != stamp:
+        with path.open() as file:
+            cached = (stamp, Document(file.readlines()))
+        _documents[path] = cached
+        if instrument.recorder is not None:
+            instrument.recorder.record('read', str(path), time.perf_counter() - start, stat.st_size)
+    else:
+        if cached[1]._index is None:
+            # loaded again, so index it once here rather than in every copy
+            cached[1]._build()
+        if instrument.recorder is not None:
+            instrument.recorder.record('cached', str(path), time.perf_counter() - start)
+    return cached[1].copy()
+
+
+def save_document(path: Path, doc: Document):
+    """
+    Writes out a parsed file and keeps it cached.  The file is written next
+    to the old one and renamed over it, so it is never seen half written,
+    and a file linked into place by link_dir or build is replaced rather
+    than written through, which would change the theme or skin it links to.
+
+    :param path: The path of the file
+    :param doc: The Document to write
+    :return: returns nothing
+    """
+    start = time.perf_counter()
+    temp = path.with_name('{}.{}.tmp'.format(path.name, os.getpid()))
+    try:
+        with temp.open('w') as file:
+            file.writelines(doc.lines)
+        if not path.is_symlink() and path.stat().st_nlink == 1:
+            # a file of the skin's own keeps its permissions
+            os.chmod(str(temp), path.stat().st_mode & 0o7777)
+        os.replace(str(temp), str(path))
+    except BaseException:
+        if temp.exists():
+            temp.unlink()
+        raise
+    stat = path.stat()
+    _documents[path] = ((stat.st_mtime_ns, stat.st_size), doc.copy())
+    if instrument.recorder is not None:
+        instrument.recorder.record('write', str(path), time.perf_counter() - start, stat.st_size)
+
+
+# settings whose value can be overwritten in place: the file, the text
+# preceding the value, the key of an unquoted value or None for a quoted
+# one, and whether every occurrence is set or only the first
+SCALAR_SETTINGS = {
+    'notify_position': (('Resource', 'styles', 'steam.styles'), b'Notifications.PanelPosition', None, True),
+    'notify_stack': (('Resource', 'styles', 'steam.styles'), b'Notifications.StackSize', None, False),
+    'grid_fade': (('Resource', 'styles', 'steam.styles'), b'GameItem_Uninstalled GamesGridImage', b'alpha', False),
+}
+
+
+# byte ranges of scalar values, keyed by (path, setting), with the (mtime, size) they were found at
+_offsets = {}
+
+
+def _locate_scalar(mm: mmap.mmap, anchor: bytes, key: bytes, every: bool) -> list:
+    """
+    Finds the byte ranges holding a scalar value
+
+    :param mm: The mapped file
+    :param anchor: The text preceding the value
+    :param key: The key of an unquoted value, or None for a quoted value
+    :param every: If every occurrence should be found, or only the first
+    :return: A list of (start, end) byte ranges, empty if not found
+    """
+    ranges = []
+    pos = mm.find(anchor)
+    while pos != -1:
+        pos += len(anchor)
+        if key is None:
+            # the text between the quotes
+            start = mm.find(b'"', pos) + 1
+            end = mm.find(b'"', start) if start else -1
+        else:
+            # the text after the key and a single separator, up to the end of the line
+            start = mm.find(key, pos)
+            start = start + len(key) + 1 if start != -1 else 0
+            end = mm.find(b'\n', start) if start else -1
+            end = len(mm) if start and end == -1 else end
+            if end > start and mm[end - 1:end] == b'\r':
+                end -= 1
+        if not start or end < start:
+            return []
+        ranges.append((start, end))
+        if not every:
+            break
+        pos = mm.find(anchor, end)
+    return ranges
+
+
+def _scalar_ranges(path: Path, name: str, mm: mmap.mmap, stamp: tuple) -> list:
+    """
+    Finds the byte ranges of a scalar value, from those remembered if the file hasn't changed
+
+    :param path: Path to the file
+    :param name: The setting, one of SCALAR_SETTINGS
+    :param mm: The mapped file
+    :param stamp: The (mtime, size) of the file
+    :return: A list of (start, end) byte ranges, empty if not found
+    """
+    parts, anchor, key, every = SCALAR_SETTINGS[name]
+    cached = _offsets.get((path, name))
+    return cached[1] if cached is not None and cached[0] == stamp else _locate_scalar(mm, anchor, key, every)
+
+
+def _scalar_fits(name: str, ranges: list, data: bytes) -> bool:
+    """
+    Checks if a value fits every occurrence of a scalar
+
+    :param name: The setting, one of SCALAR_SETTINGS
+    :param ranges: The byte ranges of the value
+    :param data: The new value
+    :return: If the value can be written over each range
+    """
+    key = SCALAR_SETTINGS[name][2]
+    return bool(ranges) and all(len(data) <= end - begin and (key is not None or len(data) == end - begin)
+                                for begin, end in ranges)
+
+
+def scalar_fits(skin: Path, name: str, value) -> bool:
+    """
+    Checks if patch_scalar can overwrite a scalar setting in place, without
+    writing anything.  The byte ranges found are remembered for the patch.
+
+    :param skin: Path to the skin root
+    :param name: The setting, one of SCALAR_SETTINGS
+    :param value: The new value
+    :return: If the value fits, False if the file must be rewritten instead
+    """
+    path = skin.joinpath(*SCALAR_SETTINGS[name][0])
+    with path.open('rb') as file:
+        stat = os.fstat(file.fileno())
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if not stat.st_size or stat.st_nlink > 1 or path.is_symlink():
+            return False
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = _scalar_ranges(path, name, mm, stamp)
+    _offsets[(path, name)] = (stamp, ranges)
+    return _scalar_fits(name, ranges, str(value).encode())
+
+
+def patch_scalar(skin: Path, name: str, value) -> bool:
+    """
+    Overwrites a scalar setting in place through a memory map, without
+    reading or rewriting the rest of the file.  The byte ranges of the value
+    are remembered, so later patches of an unchanged file go straight to
+    them.  Quoted values must keep their length, unquoted values are right
+    aligned in the space they already take up.
+
+    :param skin: Path to the skin root
+    :param name: The setting, one of SCALAR_SETTINGS
+    :param value: The new value
+    :return: If the file changed, or None if the value doesn't fit and the file must be rewritten
+    """
+    start = time.perf_counter()
+    path = skin.joinpath(*SCALAR_SETTINGS[name][0])
+    data = str(value).encode()
+
+    with path.open('r+b') as file:
+        stat = os.fstat(file.fileno())
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        # files linked into place by link_dir are shared with their theme
+        if not stat.st_size or stat.st_nlink > 1 or path.is_symlink():
+            return None
+
+        with mmap.mmap(file.fileno(), 0) as mm:
+            ranges = _scalar_ranges(path, name, mm, stamp)
+
+            # make sure every occurrence fits before touching any
+            if not _scalar_fits(name, ranges, data):
+                return None
+
+            patches = []
+            for begin, end in ranges:
+                field = data.rjust(end - begin)
+                if mm[begin:end] != field:
+                    patches.append((begin, mm[begin:end], field))
+                    mm[begin:end] = field
+            changed = bool(patches)
+            if changed:
+                mm.flush()
+
+    if changed:
+        from . import journal
+
+        os.utime(str(path))
+        journal.record_bytes(skin, path, patches)
+    stat = path.stat()
+    new_stamp = (stat.st_mtime_ns, stat.st_size)
+
+    # the other values in the file haven't moved
+    for other, entry in _offsets.items():
+        if other[0] == path and entry[0] == stamp:
+            _offsets[other] = (new_stamp, entry[1])
+    _offsets[(path, name)] = (new_stamp, ranges)
+
+    if instrument.recorder is not None:
+        instrument.recorder.record('patch', str(path), time.perf_counter() - start,
+                                   len(data) * len(ranges) if changed else 0)
+    return changed
+
+
+class SkinFiles:
+    """
+    Holds the text files of a skin in memory, so that any number of edits
+    reads and writes each file only once
+    """
+
+    def __init__(self, skin: Path):
+        self.skin = skin
+        self._files = {}
+        self._loaded = {}
+
+    def document(self, *parts: str) -> Document:
+        """
+        Gets a parsed file in the skin, loading it on first use
+
+        :param parts: The path of the file relative to the skin root
+        :return: The Document, to be edited in place
+        """
+        path = self.skin.joinpath(*parts)
+        if path not in self._files:
+            self._files[path] = load_document(path)
+            self._loaded[path] = list(self._files[path].lines)
+        return self._files[path]
+
+    def preload(self, paths: list, executor=None):
+        """
+        Loads several files of the skin, one after another or on an executor
+        so their reads overlap
+
+        :param paths: A list of tuples of the parts of each path, relative to the skin root
+        :param executor: The concurrent.futures Executor to load them on, or None to load them in turn
+        :return: returns nothing
+        """
+        paths = [x for x in paths if not self.loaded(*x)]
+
+        def load(parts):
+            return load_document(self.skin.joinpath(*parts))
+
+        if executor is not None:
+            docs = list(executor.map(load, paths))
+        else:
+            docs = [load(x) for x in paths]
+
+        for parts, doc in zip(paths, docs):
+            path = self.skin.joinpath(*parts)
+            self._files[path] = doc
+            self._loaded[path] = list(doc.lines)
+
+    def loaded(self, *parts: str) -> bool:
+        """
+        Checks if a file in the skin has been loaded
+
+        :param parts: The path of the file relative to the skin root
+        :return: If the file is held in memory
+        """
+        return self.skin.joinpath(*parts) in self._files
+
+    def save(self) -> list:
+        """
+        Writes out every loaded file that has been changed, and records the
+        changes in the journal.  Files whose content is the same as when
+        loaded are left untouched, keeping their timestamps.
+
+        :return: A list of the Paths written
+        """
+        from . import journal
+
+        changed = []
+        for path, doc in self._files.items():
+            if doc.lines != self._loaded[path]:
+                save_document(path, doc)
+                journal.record_lines(self.skin, path, self._loaded[path], doc.lines)
+                self._loaded[path] = list(doc.lines)
+                changed.append(path)
+        return changed
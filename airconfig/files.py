@@ -0,0 +1,516 @@
+"""
+Copying and moving of skin assets.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+from . import instrument
+
+
+# how many files copy_dir copies at once.  Copying serially is fastest on
+# local disks, more workers pay off on network home directories.
+COPY_WORKERS = 1
+
+# how themes are installed: 'copy', or 'symlink' or 'hardlink' to link their
+# files into place with link_dir.  None keeps whatever the skin uses now.
+THEME_LINKS = None
+
+# the store.Store that copy_dir links files from, or None to copy them
+STORE = None
+
+
+def state_dir(skin: Path) -> Path:
+    """
+    Gets the directory the configurator keeps its own files in, inside the skin
+
+    :param skin: Path to the skin root
+    :return: The Path of the directory, created if needed
+    """
+    path = skin / '.air-config'
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def file_hash(path) -> str:
+    """
+    Hashes the contents of a file
+
+    :param path: The file to hash
+    :return: The hex digest of the contents
+    """
+    import hashlib
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def move_file(src_file: str, dst_file: str):
+    """
+    Moves a file, replacing the destination
+
+    :param src_file: The file to move
+    :param dst_file: Where to move it to
+    :return: returns nothing
+    """
+    import shutil
+
+    start = time.perf_counter()
+    shutil.move(src_file, dst_file)
+    if instrument.recorder is not None:
+        instrument.recorder.record('move', dst_file, time.perf_counter() - start, os.path.getsize(dst_file))
+
+
+def _unchanged(src_file: str, dst_file: str, entries: dict) -> bool:
+    """
+    Checks if a copied file already matches its source.  Sizes are compared
+    first, then the source and stats recorded when it was last copied, and
+    only if those don't match are the contents hashed.
+
+    :param src_file: The file to copy from
+    :param dst_file: The file to copy to
+    :param entries: The manifest of copied files, updated when hashing finds a match
+    :return: If the copy can be skipped
+    """
+    try:
+        dst_stat = os.stat(dst_file)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src_file)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+
+    stats = [src_stat.st_size, src_stat.st_mtime_ns, dst_stat.st_size, dst_stat.st_mtime_ns]
+    entry = entries.get(dst_file)
+    if entry is not None and entry[0] != src_file:
+        # copied from another source, such as another theme, whose stats may well match
+        entry = None
+    if entry is not None and entry[1:5] == stats:
+        return True
+
+    known = entry[5] if entry is not None else None
+    src_hash = known if known and entry[1:3] == stats[:2] else file_hash(src_file)
+    dst_hash = known if known and entry[3:5] == stats[2:] else file_hash(dst_file)
+    if src_hash != dst_hash:
+        return False
+
+    entries[dst_file] = [src_file] + stats + [src_hash]
+    return True
+
+
+def _copy_file(src_file: str, dst_file: str, entries: dict = None) -> bool:
+    """
+    Copies a single file, overwriting as needed
+
+    :param src_file: The file to copy from
+    :param dst_file: The file to copy to
+    :param entries: The manifest of copied files, or None to always copy
+    :return: If the file was copied
+    """
+    import shutil
+
+    start = time.perf_counter()
+    if entries is not None and _unchanged(src_file, dst_file, entries):
+        if instrument.recorder is not None:
+            instrument.recorder.record('skip', dst_file, time.perf_counter() - start)
+        return False
+    if STORE is not None:
+        # each unique file is copied into the store once, and linked from there
+        STORE.link(STORE.add(src_file), dst_file)
+    else:
+        if os.path.exists(dst_file):
+            os.remove(dst_file)
+        shutil.copy(src_file, dst_file)
+    if instrument.recorder is not None:
+        instrument.recorder.record('copy', dst_file, time.perf_counter() - start, os.path.getsize(dst_file))
+
+    if entries is not None:
+        src_stat = os.stat(src_file)
+        dst_stat = os.stat(dst_file)
+        entries[dst_file] = [src_file, src_stat.st_size, src_stat.st_mtime_ns,
+                             dst_stat.st_size, dst_stat.st_mtime_ns, None]
+    return True
+
+
+@instrument.instrumented('copy_dir')
+def copy_dir(root_src_dir, root_dst_dir, manifest: Path = None, workers: int = None) -> int:
+    """
+    Copies one directory to another, overwriting as needed.  Given a
+    manifest, files that already match their source are left alone, and the
+    manifest is updated with what was copied.  With a STORE, files are
+    linked from the store instead of copied.
+
+    Files are copied by a pool of worker threads once every directory has
+    been created.  If any copies fail, the first failure in walk order is
+    raised after the rest have finished.
+
+    :param root_src_dir: The directory to copy from
+    :param root_dst_dir: The directory to copy to
+    :param manifest: Path to the JSON manifest of copied files, or None to copy everything
+    :param workers: The number of files to copy at once, defaults to COPY_WORKERS
+    :return: The number of files copied
+    """
+    entries = None
+    if manifest is not None:
+        entries = {}
+        if manifest.exists():
+            with manifest.open() as file:
+                entries = json.load(file)
+
+    # create the directories up front, so the copies don't race on them
+    pairs = []
+    for src_dir, dirs, files in os.walk(root_src_dir):
+        dst_dir = src_dir.replace(root_src_dir, root_dst_dir, 1)
+        if not os.path.exists(dst_dir):
+            os.makedirs(dst_dir)
+        for file_ in files:
+            pairs.append((os.path.join(src_dir, file_), os.path.join(dst_dir, file_)))
+
+    workers = COPY_WORKERS if workers is None else workers
+    try:
+        if workers <= 1:
+            results = [_copy_file(src_file, dst_file, entries) for src_file, dst_file in pairs]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+
+            # each copy only touches its own manifest entry
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_copy_file, src_file, dst_file, entries) for src_file, dst_file in pairs]
+            results = [future.result() for future in futures]
+    finally:
+        # keep track of whatever was copied, even on failure
+        if manifest is not None:
+            with manifest.open('w') as file:
+                json.dump(entries, file)
+        if STORE is not None:
+            STORE.save()
+
+    return sum(results)
+
+
+def load_variants(variants_dir: Path, active: str = None) -> dict:
+    """
+    Loads the manifest of a set of variants
+
+    :param variants_dir: The directory the inactive variants are kept in
+    :param active: The variant in place when there is no manifest yet
+    :return: A dict with the 'active' variant, the 'files' they consist of, the variant
+        'switching' to, or None, and any other keys the caller stored
+    """
+    manifest = variants_dir / 'variants.json'
+    if not manifest.exists():
+        return {'active': active, 'files': [], 'switching': None}
+    with manifest.open() as file:
+        return json.load(file)
+
+
+def save_variants(variants_dir: Path, variants: dict):
+    """
+    Writes the manifest of a set of variants, replacing the old one in one step
+
+    :param variants_dir: The directory the inactive variants are kept in
+    :param variants: The manifest
+    :return: returns nothing
+    """
+    variants_dir.mkdir(parents=True, exist_ok=True)
+    temp = variants_dir / 'variants.json.tmp'
+    with temp.open('w') as file:
+        json.dump(variants, file)
+    os.replace(str(temp), str(variants_dir / 'variants.json'))
+
+
+@instrument.instrumented('variant')
+def activate_variant(target_dir: str, variants_dir: Path, name: str, names: list = None, active: str = None,
+                     **info) -> bool:
+    """
+    Puts one of several variants of a set of files in place.  The files of
+    the active variant are renamed into `variants_dir/<active>`, and those of
+    the new one out of `variants_dir/<name>`, so a switch is a fixed number
+    of renames and copies nothing.  The switch is recorded in the manifest
+    before any file is moved, and each rename is only made if it hasn't been
+    already, so an interrupted switch is finished by calling again.
+
+    :param target_dir: The directory the active variant is in
+    :param variants_dir: The directory the inactive variants are kept in
+    :param name: The variant to activate
+    :param names: The file names that make up the variants, defaults to those in the manifest
+    :param active: The variant in place when there is no manifest yet
+    :param info: Other values to keep in the manifest, such as where a variant came from
+    :return: If any file was moved
+    """
+    variants = load_variants(variants_dir, active)
+    if variants['switching'] is None and variants['active'] == name:
+        if any(variants.get(k) != v for k, v in info.items()):
+            variants.update(info)
+            save_variants(variants_dir, variants)
+        return False
+
+    start = time.perf_counter()
+    if variants['switching'] is None:
+        if names is not None:
+            variants['files'] = sorted(set(variants['files']) | set(names))
+        variants['switching'] = name
+        save_variants(variants_dir, variants)
+    # finish the switch that was interrupted, if any
+    switching = variants['switching']
+    old_dir = variants_dir / variants['active']
+    new_dir = variants_dir / switching
+    old_dir.mkdir(parents=True, exist_ok=True)
+    new_dir.mkdir(parents=True, exist_ok=True)
+
+    for file_ in variants['files']:
+        current = os.path.join(target_dir, file_)
+        old = str(old_dir / file_)
+        new = str(new_dir / file_)
+        if not os.path.lexists(old) and os.path.lexists(current):
+            os.replace(current, old)
+        if os.path.lexists(new):
+            os.replace(new, current)
+
+    variants.update(active=switching, switching=None)
+    if switching == name:
+        variants.update(info)
+    save_variants(variants_dir, variants)
+    if instrument.recorder is not None:
+        instrument.recorder.record('move', target_dir, time.perf_counter() - start)
+
+    if switching != name:
+        activate_variant(target_dir, variants_dir, name, names, **info)
+    return True
+
+
+def theme_links(state: Path) -> str:
+    """
+    Gets how themes are installed into a skin
+
+    :param state: Path to the JSON state of link_dir
+    :return: THEME_LINKS if set, otherwise the mode of the links in place, or 'copy' if there are none
+    """
+    if THEME_LINKS is not None:
+        return THEME_LINKS
+    if not state.exists():
+        return 'copy'
+    with state.open() as file:
+        return json.load(file)['mode']
+
+
+def _make_link(src_file: str, dst_file: str, mode: str) -> bool:
+    """
+    Links a file into place, unless the link is already there
+
+    :param src_file: The file to link to
+    :param dst_file: Where to put the link, which must not be a regular file
+    :param mode: 'symlink' or 'hardlink'
+    :return: If the link was made
+    """
+    start = time.perf_counter()
+    target = os.path.relpath(src_file, os.path.dirname(dst_file))
+    if mode == 'symlink':
+        if os.path.islink(dst_file) and os.readlink(dst_file) == target:
+            return False
+    elif os.path.lexists(dst_file) and not os.path.islink(dst_file) and os.path.samefile(src_file, dst_file):
+        return False
+
+    if os.path.lexists(dst_file):
+        os.remove(dst_file)
+    if mode == 'symlink':
+        os.symlink(target, dst_file)
+    else:
+        os.link(src_file, dst_file)
+    if instrument.recorder is not None:
+        instrument.recorder.record('link', dst_file, time.perf_counter() - start)
+    return True
+
+
+def _restore_file(dst_file: str, base_file: str, had_base: bool):
+    """
+    Removes a link made by link_dir and puts back the file it replaced
+
+    :param dst_file: The link
+    :param base_file: Where the replaced file was set aside
+    :param had_base: If there was a file to set aside
+    :return: returns nothing
+    """
+    start = time.perf_counter()
+    if os.path.lexists(dst_file):
+        os.remove(dst_file)
+    if had_base:
+        os.replace(base_file, dst_file)
+    if instrument.recorder is not None:
+        instrument.recorder.record('unlink', dst_file, time.perf_counter() - start)
+
+
+@instrument.instrumented('link_dir')
+def link_dir(root_src_dir, root_dst_dir, state: Path, mode: str = 'symlink') -> int:
+    """
+    Links every file of one directory into another, instead of copying it.
+    The files the links replace are moved into a `base` directory next to
+    the state, and the files linked by the previous call that aren't part of
+    this one are unlinked and their base files put back.  No file contents
+    are copied, only renamed or linked.
+
+    :param root_src_dir: The directory to link from
+    :param root_dst_dir: The directory to link into
+    :param state: Path to the JSON state of the links in place
+    :param mode: 'symlink' or 'hardlink'
+    :return: The number of links made
+    """
+    linked = {}
+    if state.exists():
+        with state.open() as file:
+            linked = json.load(file)['files']
+    base_dir = str(state.parent / 'base')
+
+    files = {}
+    for src_dir, dirs, names in os.walk(root_src_dir):
+        rel_dir = os.path.relpath(src_dir, root_src_dir)
+        for name in names:
+            files[os.path.normpath(os.path.join(rel_dir, name))] = os.path.join(src_dir, name)
+
+    made = 0
+    try:
+        # put back what the previous links replaced
+        for rel in [x for x in linked if x not in files]:
+            _restore_file(os.path.join(root_dst_dir, rel), os.path.join(base_dir, rel), linked.pop(rel))
+
+        for rel, src_file in files.items():
+            dst_file = os.path.join(root_dst_dir, rel)
+            if rel not in linked:
+                had_base = os.path.lexists(dst_file)
+                if had_base:
+                    os.makedirs(os.path.dirname(os.path.join(base_dir, rel)), exist_ok=True)
+                    os.replace(dst_file, os.path.join(base_dir, rel))
+                else:
+                    os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+                linked[rel] = had_base
+            made += _make_link(src_file, dst_file, mode)
+    finally:
+        # keep track of whatever was linked, even on failure
+        with state.open('w') as file:
+            json.dump({'mode': mode, 'files': linked}, file)
+
+    return made
+
+
+@instrument.instrumented('link_dir')
+def unlink_dir(root_dst_dir, state: Path) -> int:
+    """
+    Removes every link made by link_dir and puts back the files they replaced
+
+    :param root_dst_dir: The directory the links were made in
+    :param state: Path to the JSON state of the links in place
+    :return: The number of links removed
+    """
+    if not state.exists():
+        return 0
+    with state.open() as file:
+        saved = json.load(file)
+    mode, linked = saved['mode'], saved['files']
+    base_dir = str(state.parent / 'base')
+
+    removed = 0
+    try:
+        for rel in list(linked):
+            _restore_file(os.path.join(root_dst_dir, rel), os.path.join(base_dir, rel), linked.pop(rel))
+            removed += 1
+    finally:
+        # keep track of whatever wasn't put back, on failure
+        if linked:
+            with state.open('w') as file:
+                json.dump({'mode': mode, 'files': linked}, file)
+        else:
+            os.remove(str(state))
+    return removed
+
+
+# the FICLONE ioctl, from <linux/fs.h>
+_FICLONE = 0x40049409
+
+
+def _clone_file(src_file: str, dst_file: str, mode: str) -> bool:
+    """
+    Puts a file sharing its data with another in place, falling back to a
+    copy where the file system can't share it
+
+    :param src_file: The file to clone
+    :param dst_file: Where to put the clone, which must not exist
+    :param mode: 'hardlink', 'reflink' for a copy-on-write clone, or 'copy'
+    :return: If the data is shared, rather than copied
+    """
+    import shutil
+
+    if mode == 'hardlink':
+        try:
+            os.link(src_file, dst_file)
+            return True
+        except OSError:
+            # another file system, or one without hard links
+            pass
+    elif mode == 'reflink':
+        try:
+            import fcntl
+
+            with open(src_file, 'rb') as src, open(dst_file, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            shutil.copystat(src_file, dst_file)
+            return True
+        except (OSError, ImportError):
+            # no copy-on-write clones on this file system or system
+            pass
+    shutil.copy2(src_file, dst_file)
+    return False
+
+
+@instrument.instrumented('clone_tree')
+def clone_tree(root_src_dir, root_dst_dir, mode: str = 'hardlink', skip=(), materialize=None) -> tuple:
+    """
+    Makes a tree that shares the data of its files with another, so it costs
+    next to no disk or time.  The editors replace rather than write through
+    files with more than one link, so the original is left untouched by
+    edits to the clone.  Symbolic links are recreated as they are.  If a
+    file can't be shared, the rest are copied.
+
+    :param root_src_dir: The directory to clone
+    :param root_dst_dir: The directory to create
+    :param mode: 'hardlink', 'reflink' or 'copy', see _clone_file
+    :param skip: Paths relative to root_src_dir to leave out, with everything in them
+    :param materialize: A function of a path relative to root_src_dir, telling if the file
+        must be copied rather than shared, or None to share every file
+    :return: A tuple of the number of files shared and of files copied
+    """
+    import shutil
+
+    shared = copied = 0
+    for src_dir, dirs, names in os.walk(root_src_dir):
+        rel_dir = os.path.relpath(src_dir, root_src_dir)
+        dst_dir = os.path.normpath(os.path.join(root_dst_dir, rel_dir))
+        os.makedirs(dst_dir, exist_ok=True)
+        for name in list(dirs):
+            rel = os.path.normpath(os.path.join(rel_dir, name))
+            if rel in skip:
+                dirs.remove(name)
+            elif os.path.islink(os.path.join(src_dir, name)):
+                # os.walk doesn't follow it, so it is linked like a file
+                os.symlink(os.readlink(os.path.join(src_dir, name)), os.path.join(dst_dir, name))
+
+        for name in names:
+            rel = os.path.normpath(os.path.join(rel_dir, name))
+            src_file, dst_file = os.path.join(src_dir, name), os.path.join(dst_dir, name)
+            if rel in skip:
+                continue
+            if os.path.islink(src_file):
+                os.symlink(os.readlink(src_file), dst_file)
+            elif materialize is not None and materialize(rel):
+                shutil.copy2(src_file, dst_file)
+                copied += 1
+            elif _clone_file(src_file, dst_file, mode):
+                shared += 1
+            else:
+                # the rest of the tree is on the same file system, so don't try again
+                mode = 'copy'
+                copied += 1
+    return shared, copied
@@ -0,0 +1,114 @@
+"""
+Applying a profile to many skins at once.
+"""
+import glob
+import os
+import time
+from pathlib import Path
+
+from . import files, instrument
+from .catalog import is_air_skin
+from .settings import apply_profile, get_status
+from .store import Store
+
+
+def find_skins(patterns: list) -> list:
+    """
+    Expands glob patterns into the skin directories they match
+
+    :param patterns: A list of paths or glob patterns, which may start with ~
+    :return: A sorted list of Paths, without duplicates
+    """
+    skins = set()
+    for pattern in patterns:
+        skins.update(Path(x) for x in glob.glob(os.path.expanduser(pattern)) if os.path.isdir(x))
+    return sorted(skins)
+
+
+def _apply_target(skin: Path, profile: dict, copy_workers: int, theme_links: str, store: Path,
+                  record: bool) -> tuple:
+    """
+    Applies a profile to one skin of a fleet, in a worker process
+
+    :param skin: Path to the skin root
+    :param profile: A dict of setting names to values
+    :param copy_workers: The number of files to copy at once
+    :param theme_links: How to install themes, see files.THEME_LINKS
+    :param store: Path to the store to link files from, or None to copy them
+    :param record: If the operations should be recorded
+    :return: A tuple of the skin, the seconds taken, the number of files changed, the error or None,
+        and the recorded totals or None
+    """
+    files.COPY_WORKERS = copy_workers
+    files.THEME_LINKS = theme_links
+    files.STORE = Store(store) if store is not None else None
+    recorder = instrument.enable_instrumentation() if record else None
+
+    start = time.perf_counter()
+    changed, error = [], None
+    try:
+        if not is_air_skin(skin):
+            raise ValueError('Invalid skin - not Air')
+        changed = apply_profile(skin, profile)
+    except Exception as e:
+        error = '{}: {}'.format(type(e).__name__, e)
+    totals = recorder.report()['totals'] if recorder is not None else None
+    return skin, time.perf_counter() - start, len(changed), error, totals
+
+
+def apply_fleet(skins: list, profile: dict, workers: int = None) -> list:
+    """
+    Applies a profile to many skins at once, one process per skin.  A
+    failure on one skin doesn't stop the others.  While instrumentation is
+    on, each skin is recorded as a target and the workers' totals are added
+    to the report.
+
+    :param skins: A list of Paths to skin roots
+    :param profile: A dict of setting names to values
+    :param workers: The number of processes, defaults to the number of CPUs
+    :return: A list of (skin, seconds, files changed, error or None) tuples, in the order of skins
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_apply_target, skin, profile, files.COPY_WORKERS, files.THEME_LINKS,
+                                   files.STORE.path if files.STORE is not None else None,
+                                   instrument.recorder is not None)
+                   for skin in skins]
+
+    results = []
+    for future in futures:
+        skin, seconds, changed, error, totals = future.result()
+        if instrument.recorder is not None:
+            instrument.recorder.merge(totals)
+            instrument.recorder.record('target', str(skin), seconds)
+        results.append((skin, seconds, changed, error))
+    return results
+
+
+def get_fleet_status(skins: list, workers: int = None) -> list:
+    """
+    Reads the settings of many skins, one after another.  With workers, the
+    files of every skin are read on one pool of threads, which is kept
+    between skins, see get_status.
+
+    :param skins: A list of Paths to skin roots
+    :param workers: The number of threads to read the files of a skin on, or None to read them in turn
+    :return: A list of (skin, settings or None, error or None) tuples, in the order of skins
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    results = []
+    executor = ThreadPoolExecutor(max_workers=workers) if workers else None
+    try:
+        for skin in skins:
+            try:
+                if not is_air_skin(skin):
+                    raise ValueError('Invalid skin - not Air')
+                results.append((skin, get_status(skin, executor), None))
+            except Exception as e:
+                results.append((skin, None, '{}: {}'.format(type(e).__name__, e)))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return results
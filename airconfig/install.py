@@ -0,0 +1,376 @@
+"""
+Installing and upgrading Air from a release archive.  The files extracted
+are recorded in a manifest, so an upgrade only writes the files the new
+release changed and removes the ones it dropped, then puts the skin's
+settings back.
+"""
+import contextlib
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+
+from . import instrument
+from .files import state_dir
+
+# the size of the pieces members are read and written in
+CHUNK_SIZE = 1 << 16
+
+# members up to this size are compared in memory, larger ones in a temporary file
+SPOOL_SIZE = 8 << 20
+
+# the files settings are edited in, which are merged on upgrade
+TEXT_SUFFIXES = ('.styles', '.layout', '.ini')
+
+
+@contextlib.contextmanager
+def _archive(path: Path):
+    """
+    Opens a zip or tar archive, compressed or not
+
+    :param path: The archive
+    :return: A context manager giving a list of (name, size, crc, mtime, open) tuples for the regular
+        files, in archive order.  The crc is None for tar members, whose headers don't carry one.
+    """
+    import tarfile
+    import zipfile
+
+    if zipfile.is_zipfile(str(path)):
+        with zipfile.ZipFile(str(path)) as archive:
+            yield [(x.filename, x.file_size, x.CRC, None, lambda x=x: archive.open(x))
+                   for x in archive.infolist() if not x.is_dir()]
+    else:
+        try:
+            archive = tarfile.open(str(path))
+        except tarfile.ReadError:
+            raise ValueError('Not a zip or tar archive: {}'.format(path))
+        with archive:
+            # links and devices aren't part of a skin
+            yield [(x.name, x.size, None, x.mtime, lambda x=x: archive.extractfile(x))
+                   for x in archive.getmembers() if x.isfile()]
+
+
+def _clean(name: str) -> str:
+    """
+    Removes the ./ some tools start the names of archive members with
+
+    :param name: The name of the member
+    :return: The name without it
+    """
+    while name.startswith('./'):
+        name = name[2:]
+    return name
+
+
+def _root(names: list) -> str:
+    """
+    Gets the directory all the files of an archive are in, as in a release
+    of Air-for-Steam-master/...
+
+    :param names: The names of the files
+    :return: The name of the directory, or an empty string if the files aren't in a single one
+    """
+    names = [_clean(x) for x in names]
+    tops = {x.split('/', 1)[0] for x in names}
+    if len(tops) == 1 and all('/' in x for x in names):
+        return tops.pop()
+    return ''
+
+
+def _relative(name: str, root: str) -> str:
+    """
+    Gets the path of a member relative to the skin root, refusing paths that would leave it
+
+    :param name: The name of the member
+    :param root: The directory of the skin in the archive, see _root
+    :return: The path relative to the skin root
+    """
+    name = _clean(name)
+    if root:
+        name = name[len(root) + 1:]
+    parts = name.split('/')
+    if name.startswith('/') or '..' in parts or '.air-config' in parts or '\\' in name:
+        raise ValueError('Unsafe path in archive: {}'.format(name))
+    return os.path.join(*parts)
+
+
+def _file_crc(path: str) -> int:
+    """
+    Computes the CRC-32 of a file, as stored in zip archives
+
+    :param path: The file
+    :return: The CRC
+    """
+    crc = 0
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def load_manifest(skin: Path) -> dict:
+    """
+    Loads the record of the files installed from an archive
+
+    :param skin: Path to the skin root
+    :return: A dict of the 'archive' installed and its 'files', keyed by their path relative to the
+        skin root, with a list of their size, CRC-32 and modification time in the archive
+    """
+    path = state_dir(skin) / 'install.json'
+    if not path.exists():
+        return {'archive': None, 'files': {}}
+    with path.open() as file:
+        return json.load(file)
+
+
+def save_manifest(skin: Path, manifest: dict):
+    """
+    Writes the record of the files installed, replacing the old one in one step
+
+    :param skin: Path to the skin root
+    :param manifest: The manifest, see load_manifest
+    :return: returns nothing
+    """
+    path = state_dir(skin)
+    with (path / 'install.json.tmp').open('w') as file:
+        json.dump(manifest, file)
+    os.replace(str(path / 'install.json.tmp'), str(path / 'install.json'))
+
+
+def _unchanged(dst_file: str, size: int, crc: int, mtime: int, entry: list) -> bool:
+    """
+    Checks if a member is already in place, without reading it when its header is enough
+
+    :param dst_file: Where the member goes
+    :param size: The size of the member
+    :param crc: The CRC-32 of the member, or None if it isn't known yet
+    :param mtime: The modification time of the member, or None if it isn't known
+    :param entry: The manifest entry of the file, or None if it wasn't installed from an archive
+    :return: If the file doesn't need to be written
+    """
+    if not os.path.lexists(dst_file):
+        return False
+    if entry is not None:
+        # the skin's own edits to a file the release didn't change are kept
+        return entry[0] == size and (entry[1] == crc if crc is not None else entry[2] == mtime)
+    # a skin unpacked by hand: compare the file itself, if it could match
+    return crc is not None and os.path.getsize(dst_file) == size and _file_crc(dst_file) == crc
+
+
+def _write(dst_file: str, data):
+    """
+    Writes a file through a temporary file renamed into place, so a link there is replaced
+    rather than written through
+
+    :param dst_file: The file
+    :param data: The binary file object to write the contents of, from the start
+    :return: returns nothing
+    """
+    import shutil
+
+    os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+    temp = '{}.{}.tmp'.format(dst_file, os.getpid())
+    data.seek(0)
+    with open(temp, 'wb') as file:
+        shutil.copyfileobj(data, file, CHUNK_SIZE)
+    os.replace(temp, dst_file)
+
+
+def _extract(source, name: str, dst_file: str, base_file: str, size: int, entry: list) -> tuple:
+    """
+    Reads a member and writes it into place, unless what is there has the same contents.  A
+    text file the skin has edited is merged with the release, given the copy of the file from
+    the release it was installed from.
+
+    :param source: The open member
+    :param name: The path of the member relative to the skin root
+    :param dst_file: Where the member goes
+    :param base_file: Where the release's copy of a text file is kept, or None for other files
+    :param size: The size of the member
+    :param entry: The manifest entry of the file, or None if it wasn't installed from an archive
+    :return: A tuple of the CRC-32 of the member, if it was written and the list of conflicts merging it
+    """
+    import io
+    import tempfile
+
+    with tempfile.SpooledTemporaryFile(SPOOL_SIZE) as data:
+        crc = 0
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+            data.write(chunk)
+
+        had_base = base_file is not None and os.path.exists(base_file)
+        # a tar member whose timestamp changed may still have the same contents
+        if _unchanged(dst_file, size, crc, None, entry):
+            if base_file is not None and not had_base:
+                _write(base_file, data)
+            return crc, False, []
+
+        conflicts = []
+        if had_base and os.path.exists(dst_file):
+            from .merge import merge
+
+            with open(base_file) as file:
+                base = file.readlines()
+            with open(dst_file) as file:
+                ours = file.readlines()
+            data.seek(0)
+            theirs = io.StringIO(data.read().decode(), newline=None).readlines()
+            merged, conflicts = merge(name, base, ours, theirs)
+            _write(dst_file, io.BytesIO(''.join(merged).encode()))
+        else:
+            _write(dst_file, data)
+        if base_file is not None:
+            _write(base_file, data)
+    return crc, True, conflicts
+
+
+def extract(archive: Path, skin: Path) -> tuple:
+    """
+    Brings the files of a skin up to date with a release archive: members
+    that are new or changed since the last archive installed are written,
+    the rest are only read, and files the new release no longer has are
+    removed.  The release's copy of each text file is kept, so the edits a
+    skin made to one the next release changes are merged into it.
+
+    :param archive: The zip or tar archive of the release
+    :param skin: Path to the skin root, created if needed
+    :return: A tuple of the numbers of files written, left unchanged and removed, and the list of
+        conflicts merging the skin's edits
+    """
+    with _archive(archive) as members:
+        root = _root([x[0] for x in members])
+        names = [_relative(x[0], root) for x in members]
+        if 'Changelog.url' not in names:
+            raise ValueError('Not an Air release: {}'.format(archive))
+
+        skin.mkdir(parents=True, exist_ok=True)
+        manifest = load_manifest(skin)
+        release = state_dir(skin) / 'release'
+        old = manifest['files']
+        files = {}
+        written, unchanged, removed, conflicts = 0, 0, 0, []
+
+        for name, (_, size, crc, mtime, open_member) in zip(names, members):
+            start = time.perf_counter()
+            dst_file = str(skin / name)
+            base_file = str(release / name) if name.endswith(TEXT_SUFFIXES) else None
+            entry = old.get(name)
+            if _unchanged(dst_file, size, crc, mtime, entry) and (base_file is None or os.path.exists(base_file)):
+                files[name] = [size, crc, mtime] if entry is None else [size, entry[1], mtime]
+                unchanged += 1
+                if instrument.recorder is not None:
+                    instrument.recorder.record('skip', dst_file, time.perf_counter() - start)
+                continue
+
+            with open_member() as source:
+                crc, changed, merged = _extract(source, name, dst_file, base_file, size, entry)
+            files[name] = [size, crc, mtime]
+            conflicts.extend(merged)
+            if changed:
+                written += 1
+                if instrument.recorder is not None:
+                    instrument.recorder.record('extract', dst_file, time.perf_counter() - start, size)
+            else:
+                unchanged += 1
+
+    # remove what the old release had and the new one doesn't, and the directories left empty
+    for name in old:
+        if name in files:
+            continue
+        if os.path.exists(str(release / name)):
+            os.remove(str(release / name))
+        if not os.path.lexists(str(skin / name)):
+            continue
+        os.remove(str(skin / name))
+        removed += 1
+        parent = os.path.dirname(name)
+        while parent and not os.listdir(str(skin / parent)):
+            os.rmdir(str(skin / parent))
+            parent = os.path.dirname(parent)
+
+    manifest.update(archive=os.path.basename(str(archive)), files=files)
+    save_manifest(skin, manifest)
+    return written, unchanged, removed, conflicts
+
+
+def archive_name(archive: Path) -> str:
+    """
+    Gets the name a release archive installs its skin under
+
+    :param archive: The zip or tar archive of the release
+    :return: The directory in the archive the skin is in, or else the name of the archive
+        without its extensions
+    """
+    with _archive(archive) as members:
+        root = _root([x[0] for x in members])
+    return root or os.path.basename(str(archive)).split('.')[0]
+
+
+def install(archive: Path, skin: Path, profile: dict = None) -> tuple:
+    """
+    Installs a release of Air, or upgrades the one in the skin.  Before an
+    upgrade the current settings are saved.  The skin's edits are merged
+    into the files the release changed, then each setting is applied again
+    and read back, so a setting the new release has no place for is
+    reported rather than stopping the rest.  If an upgrade is interrupted,
+    the next one applies the settings saved by the first.
+
+    :param archive: The zip or tar archive of the release
+    :param skin: Path to the skin root
+    :param profile: The settings to apply, instead of those of the skin being upgraded
+    :return: A tuple of the numbers of files written, left unchanged and removed, the list of
+        conflicts, as messages, and the Paths of the text files changed by applying the settings
+    """
+    from . import journal
+    from .catalog import is_air_skin
+    from .document import SkinFiles
+    from .settings import STATUS_SETTINGS, apply_profile, get_square_avatars, get_status, set_square_avatars
+
+    upgrade = skin.exists() and bool(os.listdir(str(skin)))
+    if upgrade and not is_air_skin(skin):
+        raise ValueError('{} is not an Air skin'.format(skin))
+
+    saved = skin / '.air-config' / 'profile.json'
+    if upgrade and profile is None:
+        if saved.exists():
+            with saved.open() as file:
+                profile = json.load(file)
+        else:
+            # settings that aren't set, such as a color, are left out
+            profile = {name: value for name, value in get_status(skin).items() if value != ''}
+            with (state_dir(skin) / 'profile.json').open('w') as file:
+                json.dump(profile, file)
+
+    if upgrade and get_square_avatars(SkinFiles(skin)):
+        # let the release compare its own round avatars, and switch to square ones again after
+        set_square_avatars(SkinFiles(skin), False)
+
+    written, unchanged, removed, conflicts = extract(archive, skin)
+
+    changed = []
+    if profile is not None:
+        applied = []
+        with journal.operation(skin, 'install'):
+            for name, value in profile.items():
+                try:
+                    for path in apply_profile(skin, {name: value}):
+                        if path not in changed:
+                            changed.append(path)
+                    applied.append(name)
+                except (IndexError, KeyError, ValueError) as e:
+                    conflicts.append('{}: not applied, {}: {}'.format(name, type(e).__name__, e))
+
+        files = SkinFiles(skin)
+        for name in applied:
+            try:
+                value = STATUS_SETTINGS[name](files)
+            except (IndexError, KeyError, ValueError) as e:
+                conflicts.append('{}: can\'t be read back, {}: {}'.format(name, type(e).__name__, e))
+                continue
+            if value != profile[name]:
+                conflicts.append('{}: is {!r} instead of {!r}'.format(name, value, profile[name]))
+    if saved.exists():
+        os.remove(str(saved))
+    return written, unchanged, removed, conflicts, changed
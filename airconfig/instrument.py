@@ -0,0 +1,124 @@
+"""
+Timing and size counters for file operations and edits.
+"""
+import functools
+import json
+import sys
+import threading
+import time
+
+
+class Recorder:
+    """
+    Collects the timings and sizes of file operations and edits.  Events are
+    totalled by kind and by name, and either kept for the final report or
+    streamed out as JSON lines as they happen.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.events = []
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, name: str, seconds: float, size: int = 0):
+        """
+        Records one operation
+
+        :param kind: The kind of operation, such as 'read' or 'edit'
+        :param name: What was operated on, a path or function name
+        :param seconds: How long it took
+        :param size: The number of bytes involved
+        :return: returns nothing
+        """
+        event = {'kind': kind, 'name': name, 'seconds': seconds, 'bytes': size}
+        with self._lock:
+            for key in (kind, '{}:{}'.format(kind, name)):
+                total = self.totals.setdefault(key, {'count': 0, 'seconds': 0.0, 'bytes': 0})
+                total['count'] += 1
+                total['seconds'] += seconds
+                total['bytes'] += size
+            if self.stream is not None:
+                self.stream.write(json.dumps(event) + '\n')
+                self.stream.flush()
+            else:
+                self.events.append(event)
+
+    def merge(self, totals: dict):
+        """
+        Adds the totals recorded by another Recorder, such as one in a worker process
+
+        :param totals: The totals of the other Recorder's report
+        :return: returns nothing
+        """
+        with self._lock:
+            for key, other in totals.items():
+                total = self.totals.setdefault(key, {'count': 0, 'seconds': 0.0, 'bytes': 0})
+                for field in total:
+                    total[field] += other[field]
+
+    def report(self) -> dict:
+        """
+        Summarizes what was recorded
+
+        :return: A dict of the totals, and the events if they weren't streamed
+        """
+        with self._lock:
+            report = {'totals': dict(self.totals)}
+            if self.stream is None:
+                report['events'] = list(self.events)
+        return report
+
+
+# the active Recorder, or None while instrumentation is off
+recorder = None
+
+
+def write_report(recorder: Recorder, path: str):
+    """
+    Writes the report of a Recorder as JSON
+
+    :param recorder: The Recorder
+    :param path: The file to write, or - for standard output
+    :return: returns nothing
+    """
+    if path == '-':
+        json.dump(recorder.report(), sys.stdout, indent=2)
+        print()
+    else:
+        with open(path, 'w') as file:
+            json.dump(recorder.report(), file, indent=2)
+
+
+def enable_instrumentation(stream=None) -> Recorder:
+    """
+    Starts recording file operations and edits
+
+    :param stream: A text stream to write each event to as a JSON line, or None to keep them
+    :return: The Recorder
+    """
+    global recorder
+    recorder = Recorder(stream)
+    return recorder
+
+
+def instrumented(kind: str):
+    """
+    Decorates a function so that its calls are timed while instrumentation
+    is on.  While it is off, the only cost is a check of recorder.
+
+    :param kind: The kind of operation to record the calls as
+    :return: The decorator
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if recorder is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(kind, func.__name__, time.perf_counter() - start)
+        return wrapper
+    return decorate
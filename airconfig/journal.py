@@ -0,0 +1,301 @@
+"""
+A journal of the edits made to a skin, for undoing them.  Each entry keeps
+only what an operation replaced: the lines spliced out of each text file,
+or the bytes overwritten in place, so entries are small and undoing one
+touches only the files it changed.
+"""
+import contextlib
+import json
+import os
+import time
+from pathlib import Path
+
+from .document import load_document, save_document
+from .files import state_dir
+
+# the number of entries kept, older ones are dropped
+JOURNAL_SIZE = 200
+
+# the entry being collected by operation(), or None
+_current = None
+
+
+def _journal_dir(skin: Path) -> Path:
+    """
+    Gets the directory the entries of a skin are kept in
+
+    :param skin: Path to the skin root
+    :return: The Path of the directory, created if needed
+    """
+    path = state_dir(skin) / 'journal'
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def _text_hash(lines: list) -> str:
+    """
+    Hashes the text of a file
+
+    :param lines: The lines of the file
+    :return: The hex digest of the text
+    """
+    import hashlib
+
+    return hashlib.sha1(''.join(lines).encode()).hexdigest()
+
+
+def _write_entry(skin: Path, entry: dict):
+    """
+    Adds an entry to the end of the journal, dropping the oldest ones past JOURNAL_SIZE
+
+    :param skin: Path to the skin root
+    :param entry: The entry
+    :return: returns nothing
+    """
+    path = _journal_dir(skin)
+    names = sorted(os.listdir(str(path)))
+    number = int(names[-1].split('.')[0]) + 1 if names else 1
+    with (path / '{:08}.json'.format(number)).open('w') as file:
+        json.dump(entry, file)
+    for name in names[:max(len(names) + 1 - JOURNAL_SIZE, 0)]:
+        os.remove(str(path / name))
+
+
+def _add(skin: Path, change: dict):
+    """
+    Records the change of one file, in the current operation or as an entry of its own
+
+    :param skin: Path to the skin root
+    :param change: The change
+    :return: returns nothing
+    """
+    if _current is not None and _current['skin'] == skin:
+        _current['entry']['files'].append(change)
+    else:
+        _write_entry(skin, {'label': 'edit', 'time': time.time(), 'name': None, 'files': [change]})
+
+
+def record_lines(skin: Path, path: Path, old: list, new: list):
+    """
+    Records a rewrite of a text file
+
+    :param skin: Path to the skin root
+    :param path: The file
+    :param old: The lines before
+    :param new: The lines written
+    :return: returns nothing
+    """
+    import difflib
+
+    # the lines of old that replace each changed range of new
+    ops = []
+    if len(old) == len(new):
+        # most edits rewrite lines where they are, so compare them in place
+        for i in range(len(new)):
+            if old[i] == new[i]:
+                continue
+            if ops and ops[-1][1] == i:
+                ops[-1][1] += 1
+                ops[-1][2].append(old[i])
+            else:
+                ops.append([i, i + 1, [old[i]]])
+    else:
+        # only match up what lies between the unchanged start and end
+        start = 0
+        while start < min(len(old), len(new)) and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < min(len(old), len(new)) - start and old[-1 - end] == new[-1 - end]:
+            end += 1
+        matcher = difflib.SequenceMatcher(None, new[start:len(new) - end], old[start:len(old) - end])
+        ops = [[start + j1, start + j2, old[start + i1:start + i2]]
+               for tag, j1, j2, i1, i2 in matcher.get_opcodes() if tag != 'equal']
+    _add(skin, {'path': str(path.relative_to(skin)), 'lines': ops, 'hash': _text_hash(new)})
+
+
+def record_bytes(skin: Path, path: Path, patches: list):
+    """
+    Records values overwritten in place
+
+    :param skin: Path to the skin root
+    :param path: The file
+    :param patches: A list of (offset, old bytes, new bytes) tuples
+    :return: returns nothing
+    """
+    _add(skin, {'path': str(path.relative_to(skin)),
+                'bytes': [[offset, old.decode('latin-1'), new.decode('latin-1')] for offset, old, new in patches]})
+
+
+def record_setting(skin: Path, name: str, value):
+    """
+    Records the value a setting had before an operation, for settings kept
+    in asset files rather than in text, such as the avatar variant
+
+    :param skin: Path to the skin root
+    :param name: The name of the setting, see settings.PROFILE_SETTINGS
+    :param value: The value before the operation
+    :return: returns nothing
+    """
+    if _current is not None and _current['skin'] == skin:
+        # the first value recorded is the one from before the operation
+        _current['entry']['settings'].setdefault(name, value)
+
+
+@contextlib.contextmanager
+def operation(skin: Path, label: str):
+    """
+    Collects every change made to a skin within it into a single entry, so
+    they are undone together
+
+    :param skin: Path to the skin root
+    :param label: What the operation was, shown in the history
+    :return: A context manager
+    """
+    global _current
+
+    if _current is not None:
+        # part of an operation already
+        yield
+        return
+
+    _current = {'skin': skin, 'entry': {'label': label, 'time': time.time(), 'name': None, 'files': [],
+                                        'settings': {}}}
+    try:
+        yield
+    finally:
+        entry = _current['entry']
+        _current = None
+        if entry['files'] or entry['settings']:
+            _write_entry(skin, entry)
+
+
+def snapshot(skin: Path, name: str):
+    """
+    Names the current state of the skin, to restore it later
+
+    :param skin: Path to the skin root
+    :param name: The name of the snapshot
+    :return: returns nothing
+    """
+    _write_entry(skin, {'label': 'snapshot', 'time': time.time(), 'name': name, 'files': []})
+
+
+def history(skin: Path) -> list:
+    """
+    Gets the entries of the journal
+
+    :param skin: Path to the skin root
+    :return: A list of (number, entry) tuples, oldest first
+    """
+    path = state_dir(skin) / 'journal'
+    if not path.exists():
+        return []
+    entries = []
+    for name in sorted(os.listdir(str(path))):
+        with (path / name).open() as file:
+            entries.append((int(name.split('.')[0]), json.load(file)))
+    return entries
+
+
+def _check(skin: Path, change: dict):
+    """
+    Checks that a file still holds what a change wrote
+
+    :param skin: Path to the skin root
+    :param change: The change
+    :return: The Document of a rewritten file, or None for values overwritten in place
+    """
+    path = skin / change['path']
+    if 'lines' in change:
+        doc = load_document(path)
+        if _text_hash(doc.lines) == change['hash']:
+            return doc
+    else:
+        with path.open('rb') as file:
+            for offset, old, new in change['bytes']:
+                file.seek(offset)
+                if file.read(len(new)) != new.encode('latin-1'):
+                    break
+            else:
+                return None
+    raise ValueError('{} has changed since, can\'t undo'.format(change['path']))
+
+
+def _undo_entry(skin: Path, entry: dict):
+    """
+    Puts back what an entry replaced, newest change first.  The last change
+    to every file is checked before any is touched, so an entry is undone
+    completely or not at all.
+
+    :param skin: Path to the skin root
+    :param entry: The entry
+    :return: returns nothing
+    """
+    from .document import SkinFiles
+    from .settings import ASSET_SETTINGS
+
+    checked = set()
+    for change in reversed(entry['files']):
+        if change['path'] not in checked:
+            _check(skin, change)
+            checked.add(change['path'])
+
+    for change in reversed(entry['files']):
+        path = skin / change['path']
+        if 'lines' in change:
+            doc = _check(skin, change)
+            for j1, j2, old in reversed(change['lines']):
+                doc[j1:j2] = old
+            save_document(path, doc)
+        elif path.is_symlink() or path.stat().st_nlink > 1:
+            # don't write through into the theme or store the file is linked to
+            data = bytearray(path.read_bytes())
+            for offset, old, new in change['bytes']:
+                data[offset:offset + len(old)] = old.encode('latin-1')
+            path.unlink()
+            path.write_bytes(bytes(data))
+        else:
+            with path.open('r+b') as file:
+                for offset, old, new in change['bytes']:
+                    file.seek(offset)
+                    file.write(old.encode('latin-1'))
+
+    # these setters only copy, link or move asset files, so nothing is saved
+    files = SkinFiles(skin)
+    for name, value in entry.get('settings', {}).items():
+        ASSET_SETTINGS[name](files, value)
+
+
+def undo(skin: Path, count: int = 1, name: str = None) -> int:
+    """
+    Undoes the last operations made to a skin, newest first, removing them
+    and any snapshots taken after them from the journal.  Only the entries
+    undone are read.
+
+    :param skin: Path to the skin root
+    :param count: The number of operations to undo
+    :param name: The snapshot to go back to instead, undoing everything since
+    :return: The number of operations undone
+    """
+    path = state_dir(skin) / 'journal'
+    names = sorted(os.listdir(str(path))) if path.exists() else []
+    entries = []
+    operations = 0
+    for entry_name in reversed(names):
+        if name is None and operations == count:
+            break
+        with (path / entry_name).open() as file:
+            entry = json.load(file)
+        if name is not None and entry['name'] == name:
+            break
+        entries.append((entry_name, entry))
+        if entry['name'] is None:
+            operations += 1
+    else:
+        if name is not None:
+            raise ValueError('No snapshot named {}'.format(name))
+
+    for entry_name, entry in entries:
+        _undo_entry(skin, entry)
+        os.remove(str(path / entry_name))
+    return operations
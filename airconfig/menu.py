@@ -0,0 +1,530 @@
+"""
+The interactive menus.
+"""
+import os
+import sys
+from pathlib import Path
+
+from . import journal
+from .catalog import get_colors, get_themes
+from .document import SkinFiles, patch_scalar
+from .settings import (NOTIFY_POSITIONS, get_detail_order, get_grid_fade, get_square_avatars, get_theme,
+                       set_chat_font_size, set_color, set_detail_order, set_downloads_icon, set_friends_hover,
+                       set_friends_list_shortcut, set_friends_status_lines, set_game_filters, set_grid_fade,
+                       set_inbox_icon, set_notify_pos, set_notify_stack, set_square_avatars, set_theme,
+                       set_wallet_balance)
+
+# the skins directory shown in the header, set by the command line
+skin_dir = None
+
+# the Screen the menus are drawn on, or None to print them and prompt line by line
+screen = None
+
+
+def get_int(num: str) -> int:
+    """
+    Evaluates if the given string is a valid integer
+
+    :param num: The string to evaluate
+    :return: The integer found, otherwise -1
+    """
+    if num.isdigit():
+        return int(num)
+    return -1
+
+
+def get_header() -> list:
+    """
+    Gets the lines of the program header
+
+    :return: A list of lines
+    """
+    return [
+        'air-configurator',
+        sys.platform,
+        'Skin path: ' + str(skin_dir)
+    ]
+
+
+def print_header():
+    """
+    Prints the program header
+
+    :return: returns nothing
+    """
+    for line in get_header():
+        print(line)
+
+
+def cls():
+    """
+    Clears the terminal screen
+
+    :return: returns nothing
+    """
+    if os.name == 'nt':
+        os.system('cls')
+    elif sys.stdout.isatty():
+        print('\x1b[H\x1b[2J', end='', flush=True)
+
+
+def show(lines: list):
+    """
+    Shows the header and some lines of text on a clean screen
+
+    :param lines: The lines shown below the header
+    :return: returns nothing
+    """
+    if screen is not None:
+        screen.draw(get_header() + lines)
+    else:
+        cls()
+        print_header()
+        for line in lines:
+            print(line)
+
+
+def ask(prompt: str, error: str = None) -> str:
+    """
+    Reads a line of text from the user
+
+    :param prompt: The text shown before the answer
+    :param error: A message shown first, such as why the last answer was refused
+    :return: The line entered
+    """
+    if screen is not None:
+        return screen.ask(prompt, error)
+    if error is not None:
+        print(error)
+    return input(prompt)
+
+
+def ask_int(prompt: str, valid: range, error: str = 'Invalid choice') -> int:
+    """
+    Reads a number from the user, asking again until it is valid
+
+    :param prompt: The text shown before the answer
+    :param valid: The numbers accepted
+    :param error: The message shown when a number is refused
+    :return: The number entered
+    """
+    value = get_int(ask(prompt))
+    while value not in valid:
+        value = get_int(ask(prompt, error))
+    return value
+
+
+def report(message: str, changed: bool = True):
+    """
+    Tells the user what was done and waits for them to continue
+
+    :param message: The description of the change
+    :param changed: If anything was written, otherwise the setting was already in place
+    :return: returns nothing
+    """
+    if not changed:
+        message += ' (already set, nothing written)'
+    ask('{}.  Press enter to continue...'.format(message))
+
+
+def generic_get_choice(options: list, prompt: str = 'Choose option: ', current: int = 0) -> int:
+    """
+    Prompts the user to make a choice from a list of options.  On a screen
+    the options are picked with the arrow keys, otherwise by number.
+
+    :param options: The list options to choose from
+    :param prompt: The text shown below the options
+    :param current: The option selected at first, on a screen
+    :return: The choice made
+    """
+    if screen is not None:
+        return screen.select(get_header(), options, prompt, current)
+
+    # display options
+    show(["{:4} --> {}".format(x, options[x]) for x in range(len(options))])
+
+    # get user choice
+    return ask_int(prompt, range(len(options)))
+
+
+def choose_skin(skin_list: list) -> int:
+    """
+    Prompts the user to select a skin to edit
+
+    :param skin_list: A list of available skins
+    :return: An integer representing the skin chosen
+    """
+    return generic_get_choice([x.name for x in skin_list], 'Choose skin to configure: ')
+
+
+def change_theme(skin: Path):
+    """
+    Changes the currently activated theme.
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    # get theme list
+    themes = get_themes(skin)
+
+    # get user choice of theme
+    new_theme = themes[generic_get_choice(themes, 'Choose theme: ')]
+
+    files = SkinFiles(skin)
+    if get_theme(files):
+        journal.record_setting(skin, 'theme', get_theme(files))
+    set_theme(files, new_theme)
+    files.save()
+
+    report('Theme changed to {}'.format(new_theme))
+
+
+def change_color(skin: Path):
+    """
+    Changes the currently activated color scheme
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    # get list of available colors
+    colors = get_colors(skin)
+
+    # get user choice of color
+    new_color = colors[generic_get_choice(colors, 'Choose color: ')]
+
+    files = SkinFiles(skin)
+    set_color(files, new_color)
+    changed = files.save()
+
+    report('Color changed to {}'.format(new_color), changed)
+
+
+def chat_font_size(skin: Path):
+    """
+    Changes the font size of chat
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    choice = generic_get_choice([
+        'Enter new font size',
+        'Reset to default',
+        'Cancel'
+    ])
+
+    # change font size
+    if choice == 0:
+        new_size = ask_int('Enter new font size: ', range(1, sys.maxsize), 'Invalid size')
+
+        files = SkinFiles(skin)
+        set_chat_font_size(files, new_size)
+        changed = files.save()
+
+        report('Chat font size changed to {}'.format(new_size), changed)
+    elif choice == 1:
+        files = SkinFiles(skin)
+        set_chat_font_size(files, None)
+        changed = files.save()
+
+        report('Chat font size reset', changed)
+
+
+def notify_pos(skin: Path):
+    """
+    Changes the position of desktop notifications
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    options = NOTIFY_POSITIONS
+
+    # get user choice
+    choice = generic_get_choice([x[0] for x in options], 'Choose position: ')
+
+    changed = patch_scalar(skin, 'notify_position', options[choice][1])
+    if changed is None:
+        files = SkinFiles(skin)
+        set_notify_pos(files, options[choice][1])
+        changed = files.save()
+
+    report('Notification position changed to {}'.format(options[choice][0]), changed)
+
+
+def notify_stack(skin: Path):
+    """
+    Changes the number of notifications shown in a stack
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    choice = generic_get_choice([
+        'Change stack size',
+        'Cancel'
+    ])
+
+    if choice == 0:
+        new_size = ask_int('Enter new stack size: ', range(1, sys.maxsize))
+
+        changed = patch_scalar(skin, 'notify_stack', new_size)
+        if changed is None:
+            files = SkinFiles(skin)
+            set_notify_stack(files, new_size)
+            changed = files.save()
+
+        report('Notification stack size changed to {}'.format(new_size), changed)
+
+
+def detail_reorg(skin: Path):
+    """
+    Reorganizes the sections of the detail view
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    files = SkinFiles(skin)
+    items = get_detail_order(files)
+
+    items.append('Save Order')
+
+    swap_dst = 0
+    while True:
+        # get user choice
+        swap_dst = generic_get_choice(items, 'Choose position to change: ', swap_dst)
+
+        # cancel out of loop
+        if swap_dst == len(items) - 1:
+            break
+
+        # get user choice
+        swap_src = generic_get_choice(items[:-1], 'Replace with: ', swap_dst)
+
+        # swap items
+        items[swap_src], items[swap_dst] = items[swap_dst], items[swap_src]
+
+    set_detail_order(files, items[:-1])
+    changed = files.save()
+
+    report('Display order saved', changed)
+
+
+def grid_fade(skin: Path):
+    """
+    Change the fade of the games in the grid view
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    files = SkinFiles(skin)
+
+    # get the current alpha value
+    cur_alpha = get_grid_fade(files)
+
+    show(['', 'Current fade value: {}'.format(cur_alpha)])
+
+    new_alpha = ask_int('Enter new fade value: ', range(256), 'Invalid value')
+
+    changed = patch_scalar(skin, 'grid_fade', new_alpha)
+    if changed is None:
+        set_grid_fade(files, new_alpha)
+        changed = files.save()
+
+    report('Fade value changed to {}'.format(new_alpha), changed)
+
+
+def friends_list_shorcut(skin: Path):
+    """
+    Enables or disables the friends list shortcut
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    choice = generic_get_choice([
+        'Enable shortcut',
+        'Disable shortcut'
+    ])
+
+    files = SkinFiles(skin)
+    set_friends_list_shortcut(files, choice == 0)
+    changed = files.save()
+
+    status = 'enabled' if choice == 0 else 'disabled'
+    report('Friends list shortcut {}'.format(status), changed)
+
+
+def game_filters(skin: Path):
+    """
+    Enables or disables the extra game filters
+
+    :param skin: Path to the skin root
+    :return: nothing returned
+    """
+    choice = generic_get_choice([
+        'Enable filters',
+        'Disable filters'
+    ])
+
+    files = SkinFiles(skin)
+    set_game_filters(files, choice == 0)
+    changed = files.save()
+
+    status = 'enabled' if choice == 0 else 'disabled'
+    report('Game filters dropdown {}'.format(status), changed)
+
+
+def wallet_balance(skin: Path):
+    """
+    Display the wallet balance when empty.
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    choice = generic_get_choice([
+        'Show wallet balance',
+        'Hide wallet balance'
+    ])
+
+    files = SkinFiles(skin)
+    set_wallet_balance(files, choice == 0)
+    changed = files.save()
+
+    status = 'shown' if choice == 0 else 'hidden'
+    report('Wallet balance {}'.format(status), changed)
+
+
+def inbox_icon(skin: Path):
+    """
+    Enable or disable the inbox icon when no notifications
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    choice = generic_get_choice([
+        'Show inbox icon',
+        'Hide inbox icon'
+    ])
+
+    files = SkinFiles(skin)
+    set_inbox_icon(files, choice == 0)
+    changed = files.save()
+
+    status = "enabled" if choice == 0 else "disabled"
+    report('Inbox icon {}'.format(status), changed)
+
+
+def square_avatars(skin: Path):
+    """
+    Enable or disable square friends avatars
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    choice = generic_get_choice([
+        'Enable square avatars',
+        'Disable square avatars'
+    ])
+
+    files = SkinFiles(skin)
+    journal.record_setting(skin, 'square_avatars', get_square_avatars(files))
+    set_square_avatars(files, choice == 0)
+
+    status = "enabled" if choice == 0 else "disabled"
+    report('Square avatars {}'.format(status))
+
+
+def friends_hover(skin: Path):
+    """
+    Enables or disables friends list hover effect
+
+    :param skin: Path to skin root
+    :return: returns nothing
+    """
+    choice = generic_get_choice([
+        "Enable hover effect",
+        "Disable hover effect"
+    ])
+
+    files = SkinFiles(skin)
+    set_friends_hover(files, choice == 0)
+    changed = files.save()
+
+    status = "enabled" if choice == 0 else "disabled"
+    report('Friends list hover effect {}'.format(status), changed)
+
+
+def friends_status_lines(skin: Path):
+    """
+    Adjust number of lines in the friends list status
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    choice = generic_get_choice([
+        "Status on three lines",
+        "Status on two lines"
+    ])
+
+    files = SkinFiles(skin)
+    set_friends_status_lines(files, 3 if choice == 0 else 2)
+    changed = files.save()
+
+    status = "three" if choice == 0 else "two"
+    report('Friends list status shown on {} lines'.format(status), changed)
+
+
+def downloads_icon(skin: Path):
+    """
+    Enable or disable the always on downloads icon
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    choice = generic_get_choice([
+        "Enable downloads icon",
+        "Disable downloads icon"
+    ])
+
+    files = SkinFiles(skin)
+    set_downloads_icon(files, choice == 0)
+    changed = files.save()
+
+    status = "enabled" if choice == 0 else "disabled"
+    report('Downloads icon {}'.format(status), changed)
+
+
+def configure_skin(skin):
+    """
+    Handle the options for configuring the skin
+
+    :param skin: Path to the skin root
+    :return: returns nothing
+    """
+    options = [
+        ('Change theme', change_theme),
+        ('Change color', change_color),
+        ('Change chat font size', chat_font_size),
+        ('Change notification position', notify_pos),
+        ('Change notification stack count', notify_stack),
+        ('Reorganize sections in details mode', detail_reorg),
+        ('Change fade of uninstalled games in grid mode', grid_fade),
+        ('Friends list shortcut', friends_list_shorcut),
+        ('Game filters dropdown', game_filters),
+        ('Wallet balance', wallet_balance),
+        ('Show inbox icon when no messages', inbox_icon),
+        ('Friends list square avatars', square_avatars),
+        ('Friends list hover effect', friends_hover),
+        ('Friends list status on three lines', friends_status_lines),
+        ('Always visible downloads icon', downloads_icon),
+        ('Exit', 0)
+    ]
+
+    choice = 0
+    while True:
+        choice = generic_get_choice([x[0] for x in options], 'Choose option: ', choice)
+
+        if options[choice][0] == 'Exit':
+            print("\nRestart Steam to see changes\n")
+            break
+
+        # each change is an entry of the journal of its own, undone with --undo
+        with journal.operation(skin, options[choice][1].__name__):
+            options[choice][1](skin)
@@ -0,0 +1,297 @@
+"""
+Three-way merging of the skin's text files.  The files are parsed into
+trees of blocks and properties, and the nodes of each version are matched
+by what they declare rather than by line number, so a property the skin
+edited is found again in a new release of Air even if the lines around it
+moved.  What the skin changed is carried over onto the new release, and
+where both changed the same thing the skin's version is kept and the
+conflict reported.
+"""
+import re
+
+from .document import _KEY_VALUE, _PROPERTY, _QUOTED
+
+# the first of the controls a place line or block positions
+_CONTROL = re.compile(r'\bcontrol=([^\s{},]+)')
+
+
+class Node:
+    """
+    A line of a file, or a block with the lines that open and close it and
+    the nodes inside it.  Nodes aren't changed once parsed or merged, so
+    their text is only put together once.
+    """
+    __slots__ = ('key', 'head', 'children', 'tail', '_lines')
+
+    def __init__(self, head: list, children: list = None, tail: str = None):
+        self.key = None
+        self.head = head
+        self.children = children
+        self.tail = tail
+        self._lines = None
+
+    def lines(self) -> list:
+        """
+        Gets the text of the node
+
+        :return: The lines of the node, including those of the nodes inside it, which must not be changed
+        """
+        if self._lines is None:
+            lines = list(self.head)
+            if self.children is not None:
+                for child in self.children:
+                    lines.extend(child.lines())
+                lines.append(self.tail)
+            self._lines = lines
+        return self._lines
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and self.lines() == other.lines()
+
+
+def _text(line: str) -> str:
+    """
+    Gets the declaration on a line, whether or not it is commented out
+
+    :param line: The line
+    :return: The line without comment markers, and with its whitespace collapsed
+    """
+    return ' '.join(line.strip().lstrip('/').split())
+
+
+def _braces(line: str) -> int:
+    """
+    Counts the blocks a line opens, less those it closes
+
+    :param line: The line
+    :return: The number of blocks left open
+    """
+    if '{' not in line and '}' not in line:
+        return 0
+    text = line.strip()
+    if text.startswith('//'):
+        return 0
+    bare = _QUOTED.sub('""', text)
+    return bare.count('{') - bare.count('}')
+
+
+def parse(lines: list) -> list:
+    """
+    Parses the lines of a file into a tree
+
+    :param lines: The lines of the file
+    :return: A list of the top level Nodes
+    """
+    nodes, stack = [], []
+    for line in lines:
+        current = stack[-1].children if stack else nodes
+        depth = _braces(line)
+        if depth > 0:
+            head = [line]
+            if _text(line).startswith('{') and current and current[-1].children is None and \
+                    _braces(current[-1].head[0]) == 0 and _text(current[-1].head[0]):
+                # the brace is on its own line, below the name of the block
+                head = current.pop().head + head
+            node = Node(head, [])
+            current.append(node)
+            stack.append(node)
+            # a line opening several blocks is closed as many times
+            for _ in range(depth - 1):
+                inner = Node([], [])
+                node.children.append(inner)
+                stack.append(inner)
+                node = inner
+        elif depth < 0 and stack:
+            stack.pop().tail = line
+            for _ in range(-depth - 1):
+                if stack:
+                    stack.pop().tail = ''
+        else:
+            current.append(Node([line]))
+
+    # blocks left open at the end of the file are closed by nothing
+    for node in stack:
+        node.tail = ''
+    return nodes
+
+
+def _raw_key(node: Node) -> str:
+    """
+    Gets what a node declares, to find it in other versions of the file
+
+    :param node: The node
+    :return: The key of the node, which may be shared by other nodes at the same level
+    """
+    if node.children is not None:
+        head = _text(''.join(node.head))
+        name = ' '.join(_QUOTED.sub('""', head).split('{')[0].split())
+        if name in ('', 'place'):
+            # a place block is known by the control it positions
+            controls = [_CONTROL.search(x.head[0]) for x in node.children if x.children is None and x.head]
+            controls = [x.group(1) for x in controls if x]
+            return 'block {} {}'.format(name, controls[0] if controls else '').strip()
+        return 'block ' + name
+
+    text = _text(node.head[0])
+    control = _CONTROL.search(text)
+    if control and text.startswith('place'):
+        return 'place ' + control.group(1)
+    properties = _PROPERTY.findall(text)
+    if len(properties) == 1 and text.startswith(properties[0][0]):
+        return 'prop ' + properties[0][0]
+    match = _KEY_VALUE.match(text)
+    if match:
+        return 'prop ' + match.group(1)
+    return 'line ' + text
+
+
+def _assign_keys(versions: list):
+    """
+    Keys the nodes at one level of several versions of a file, so the same
+    key names the same node in each.  Properties that appear more than once
+    in any version, such as the includes of config.ini, are told apart by
+    their values, and anything still repeated by its position among the
+    nodes of that key.
+
+    :param versions: A list of the lists of Nodes at the same level of each version
+    :return: returns nothing
+    """
+    repeated = set()
+    for nodes in versions:
+        seen = set()
+        for node in nodes:
+            node.key = _raw_key(node)
+            if node.key in seen:
+                repeated.add(node.key)
+            seen.add(node.key)
+
+    for nodes in versions:
+        counts = {}
+        for node in nodes:
+            if node.key in repeated and node.key.startswith('prop '):
+                node.key = 'line ' + _text(node.head[0])
+            counts[node.key] = counts.get(node.key, 0) + 1
+            if counts[node.key] > 1:
+                node.key = '{} #{}'.format(node.key, counts[node.key])
+
+
+def _pick(path: str, key: str, base, ours, theirs, conflicts: list):
+    """
+    Chooses between two versions of something, given what it was before either changed it
+
+    :param path: Where it is, for the conflict report
+    :param key: What it is, for the conflict report
+    :param base: What it was, or None if neither had it
+    :param ours: What the skin has
+    :param theirs: What the new release has
+    :param conflicts: The list conflicts are reported to
+    :return: The version kept, the skin's if both changed it differently
+    """
+    if ours == theirs or theirs == base:
+        return ours
+    if ours == base:
+        return theirs
+    conflicts.append('{}: {} changed in the skin and in the release, kept the skin\'s'.format(path, key))
+    return ours
+
+
+def _order(base: list, ours: list, theirs: list, kept: set) -> list:
+    """
+    Orders the keys of a merged level.  The order of the skin is used if it
+    moved nodes the release also has, as when reordering the details view,
+    otherwise the order of the release, and the nodes only the other side
+    has are placed after the node they follow there.
+
+    :param base: The keys of the base, in order
+    :param ours: The keys of the skin, in order
+    :param theirs: The keys of the release, in order
+    :param kept: The keys in the merged level
+    :return: The keys of the merged level, in order
+    """
+    common = set(base) & set(ours) & set(theirs)
+    moved = [x for x in ours if x in common] != [x for x in base if x in common]
+    first, second = (ours, theirs) if moved else (theirs, ours)
+
+    order = [x for x in first if x in kept]
+    placed = set(order)
+    before = None
+    for key in second:
+        if key in kept and key not in placed:
+            order.insert(order.index(before) + 1 if before is not None else 0, key)
+            placed.add(key)
+        if key in placed:
+            before = key
+    return order
+
+
+def _merge_level(path: str, base: list, ours: list, theirs: list, conflicts: list) -> list:
+    """
+    Merges the nodes at one level of a file
+
+    :param path: The file and blocks the level is in, for the conflict report
+    :param base: The Nodes of the old release
+    :param ours: The Nodes of the skin
+    :param theirs: The Nodes of the new release
+    :param conflicts: The list conflicts are reported to
+    :return: The merged list of Nodes
+    """
+    _assign_keys([base, ours, theirs])
+    by_base = {x.key: x for x in base}
+    by_ours = {x.key: x for x in ours}
+    by_theirs = {x.key: x for x in theirs}
+
+    merged = {}
+    for key in list(by_ours) + [x for x in by_theirs if x not in by_ours]:
+        b, o, t = by_base.get(key), by_ours.get(key), by_theirs.get(key)
+        if o is not None and t is not None:
+            if o == t or o == b or t == b:
+                merged[key] = _pick(path, key, b, o, t, conflicts)
+            elif o.children is not None and t.children is not None and (b is None or b.children is not None):
+                inner = '{} > {}'.format(path, key[len('block '):])
+                node = Node(_pick(path, key, b.head if b else None, o.head, t.head, conflicts),
+                            _merge_level(inner, b.children if b else [], o.children, t.children, conflicts),
+                            _pick(path, key, b.tail if b else None, o.tail, t.tail, conflicts))
+                node.key = key
+                merged[key] = node
+            else:
+                merged[key] = _pick(path, key, b, o, t, conflicts)
+        elif o is not None:
+            if b is None or o == b:
+                if b is None:
+                    merged[key] = o
+            else:
+                conflicts.append('{}: {} removed by the release but changed in the skin, kept the skin\'s'.format(
+                    path, key))
+                merged[key] = o
+        else:
+            if b is None:
+                merged[key] = t
+            elif t != b:
+                conflicts.append('{}: {} changed by the release but removed in the skin, left out'.format(
+                    path, key))
+
+    order = _order([x.key for x in base], [x.key for x in ours], [x.key for x in theirs], set(merged))
+    return [merged[x] for x in order]
+
+
+def merge(name: str, base: list, ours: list, theirs: list) -> tuple:
+    """
+    Merges the changes a skin made to a file into a new release of it
+
+    :param name: The name of the file, for the conflict report
+    :param base: The lines of the file in the release the skin was installed from
+    :param ours: The lines of the file in the skin
+    :param theirs: The lines of the file in the new release
+    :return: A tuple of the merged lines and a list of the conflicts, as messages
+    """
+    if ours == base:
+        return list(theirs), []
+    if theirs == base or theirs == ours:
+        return list(ours), []
+
+    conflicts = []
+    nodes = _merge_level(name, parse(base), parse(ours), parse(theirs), conflicts)
+    lines = []
+    for node in nodes:
+        lines.extend(node.lines())
+    return [x for x in lines if x != ''], conflicts
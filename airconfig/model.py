@@ -0,0 +1,318 @@
+"""
+The settings of a skin as a single value.  A SkinSettings holds any of the
+settings of a profile, can be compared, hashed and kept in sets, and is
+turned into JSON or a few dozen bytes and back.  Comparing two of them
+tells exactly which settings, and so which files, an apply has to touch.
+"""
+import json
+import os
+import struct
+from pathlib import Path
+
+from .settings import NOTIFY_POSITIONS, SETTING_FILES
+
+# the kind of value of each setting, in the order of PROFILE_SETTINGS, which is that of the binary form:
+# 'str', a 'list' of str, 'bool', a notify 'position', a chat font 'size', which is None for the default,
+# or the range of a whole number.  apply_profile checks profiles against these, so a skin never gets a
+# value its settings can't be read back as.
+_KINDS = {
+    'theme': 'str',
+    'color': 'str',
+    'chat_font_size': 'size',
+    'notify_position': 'position',
+    'notify_stack': range(1, 0x10000),
+    'detail_order': 'list',
+    'grid_fade': range(0x100),
+    'friends_list_shortcut': 'bool',
+    'game_filters': 'bool',
+    'wallet_balance': 'bool',
+    'inbox_icon': 'bool',
+    'square_avatars': 'bool',
+    'friends_hover': 'bool',
+    'friends_status_lines': range(2, 4),
+    'downloads_icon': 'bool',
+}
+
+# the version byte, the settings present and the values of the bool settings, as bit masks
+_HEADER = struct.Struct('<BHH')
+
+# sizes, and whole numbers that don't fit in a byte; a size of 0 is the default
+_SHORT = struct.Struct('<H')
+
+# the sizes a chat font may have
+_SIZES = range(1, 0x10000)
+
+_VERSION = 2
+
+
+class _Unset:
+    """
+    The value of a setting a SkinSettings leaves alone, told apart from None,
+    which is the default chat font size
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'UNSET'
+
+    def __reduce__(self):
+        return 'UNSET'
+
+
+UNSET = _Unset()
+
+
+def _check(name: str, value):
+    """
+    Checks a value is of the kind of its setting, and fits in its binary form
+
+    :param name: The setting, see _KINDS
+    :param value: The value, with lists as tuples
+    :return: returns nothing
+    """
+    kind = _KINDS[name]
+    if kind == 'bool':
+        if not isinstance(value, bool):
+            raise ValueError('{} must be true or false'.format(name))
+    elif kind == 'str':
+        if not isinstance(value, str):
+            raise ValueError('{} must be a name'.format(name))
+    elif kind == 'position':
+        if value not in [x[1] for x in NOTIFY_POSITIONS]:
+            raise ValueError('Unknown notification position: {}'.format(value))
+    elif kind == 'list':
+        if not isinstance(value, tuple) or len(value) > 0xff or not all(isinstance(x, str) for x in value):
+            raise ValueError('{} must be a list of names'.format(name))
+    elif kind == 'size':
+        # bools are ints too, but not numbers of any kind here
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value not in _SIZES):
+            raise ValueError('{} must be null or a whole number from {} to {}'.format(name, _SIZES[0], _SIZES[-1]))
+    elif not isinstance(value, int) or isinstance(value, bool) or value not in kind:
+        raise ValueError('{} must be a whole number from {} to {}'.format(name, kind[0], kind[-1]))
+
+
+class SkinSettings:
+    """
+    Some or all of the settings of a skin.  Settings not given are UNSET,
+    and are left alone when applied.  Instances can't be changed; use
+    replace() to make a changed copy.
+    """
+    __slots__ = tuple(_KINDS) + ('_hash',)
+
+    def __init__(self, **values):
+        unknown = set(values) - set(_KINDS)
+        if unknown:
+            raise ValueError('Unknown profile settings: {}'.format(', '.join(sorted(str(x) for x in unknown))))
+        for name in _KINDS:
+            value = values.get(name, UNSET)
+            if isinstance(value, list):
+                value = tuple(value)
+            if value is not UNSET:
+                _check(name, value)
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_hash', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('SkinSettings can\'t be changed, use replace()')
+
+    def __delattr__(self, name):
+        raise AttributeError('SkinSettings can\'t be changed, use replace()')
+
+    def values(self) -> tuple:
+        """
+        Gets the value of every setting
+
+        :return: A tuple of the values, UNSET for those not given, in the order of PROFILE_SETTINGS
+        """
+        return tuple(getattr(self, x) for x in _KINDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, SkinSettings):
+            return NotImplemented
+        return self.values() == other.values()
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(self.values()))
+        return self._hash
+
+    def __repr__(self):
+        return 'SkinSettings({})'.format(', '.join('{}={!r}'.format(k, v) for k, v in self.to_profile().items()))
+
+    def __reduce__(self):
+        return SkinSettings.from_profile, (self.to_profile(),)
+
+    def replace(self, **values) -> 'SkinSettings':
+        """
+        Makes a copy with some settings changed
+
+        :param values: The settings to change, UNSET to leave one alone
+        :return: The new SkinSettings
+        """
+        profile = self.to_profile()
+        profile.update(values)
+        return SkinSettings(**{k: v for k, v in profile.items() if v is not UNSET})
+
+    @classmethod
+    def from_profile(cls, profile: dict) -> 'SkinSettings':
+        """
+        Makes the settings of a profile
+
+        :param profile: A dict of setting names to values, see PROFILE_SETTINGS
+        :return: The SkinSettings
+        """
+        return cls(**profile)
+
+    @classmethod
+    def read(cls, skin: Path, executor=None) -> 'SkinSettings':
+        """
+        Reads the current settings of a skin
+
+        :param skin: Path to the skin root
+        :param executor: The concurrent.futures Executor to read the files on, see get_status
+        :return: The SkinSettings, without the settings that aren't set, such as a missing color
+        """
+        from .settings import get_status
+
+        return cls(**{k: v for k, v in get_status(skin, executor).items() if v != ''})
+
+    def to_profile(self) -> dict:
+        """
+        Gets the settings given, as a profile
+
+        :return: A dict of setting names to values, in the order of PROFILE_SETTINGS
+        """
+        return {k: list(v) if isinstance(v, tuple) else v for k, v in zip(_KINDS, self.values()) if v is not UNSET}
+
+    def to_json(self) -> str:
+        """
+        Writes the settings given as a JSON profile
+
+        :return: The JSON text
+        """
+        return json.dumps(self.to_profile())
+
+    @classmethod
+    def from_json(cls, text: str) -> 'SkinSettings':
+        """
+        Reads settings from a JSON profile
+
+        :param text: The JSON text
+        :return: The SkinSettings
+        """
+        return cls(**json.loads(text))
+
+    def to_bytes(self) -> bytes:
+        """
+        Packs the settings into a compact binary form: a header of which
+        settings are given and of the bool ones, then the other values in
+        order, strings as a length byte and UTF-8, and the sizes as two bytes
+
+        :return: The bytes
+        """
+        present = flags = 0
+        body = bytearray()
+
+        def pack_str(text):
+            data = text.encode()
+            if len(data) > 255:
+                raise ValueError('{!r} is too long to pack'.format(text))
+            body.append(len(data))
+            body.extend(data)
+
+        for bit, (name, kind) in enumerate(_KINDS.items()):
+            value = getattr(self, name)
+            if value is UNSET:
+                continue
+            present |= 1 << bit
+            if kind == 'bool':
+                flags |= bool(value) << bit
+            elif kind in ('str', 'position'):
+                pack_str(value)
+            elif kind == 'list':
+                body.append(len(value))
+                for item in value:
+                    pack_str(item)
+            elif kind == 'size':
+                # 0 is the default size
+                body.extend(_SHORT.pack(0 if value is None else value))
+            elif kind.stop > 0x100:
+                body.extend(_SHORT.pack(value))
+            else:
+                body.append(value)
+        return _HEADER.pack(_VERSION, present, flags) + bytes(body)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SkinSettings':
+        """
+        Unpacks settings packed by to_bytes
+
+        :param data: The bytes
+        :return: The SkinSettings
+        """
+        version, present, flags = _HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError('Unknown settings version {}'.format(version))
+        pos = _HEADER.size
+
+        def unpack_str():
+            nonlocal pos
+            length = data[pos]
+            pos += 1 + length
+            return data[pos - length:pos].decode()
+
+        values = {}
+        for bit, (name, kind) in enumerate(_KINDS.items()):
+            if not present & (1 << bit):
+                continue
+            if kind == 'bool':
+                values[name] = bool(flags & (1 << bit))
+            elif kind in ('str', 'position'):
+                values[name] = unpack_str()
+            elif kind == 'list':
+                count = data[pos]
+                pos += 1
+                values[name] = [unpack_str() for _ in range(count)]
+            elif kind == 'size' or kind.stop > 0x100:
+                value, = _SHORT.unpack_from(data, pos)
+                values[name] = value if kind != 'size' or value else None
+                pos += _SHORT.size
+            else:
+                values[name] = data[pos]
+                pos += 1
+        return cls(**values)
+
+    def diff(self, other: 'SkinSettings') -> dict:
+        """
+        Compares two sets of settings
+
+        :param other: The other SkinSettings
+        :return: A dict of the names of the settings that differ, including those given in only
+            one of them, to a tuple of the value here and the value in other
+        """
+        return {name: (a, b) for name, a, b in zip(_KINDS, self.values(), other.values()) if a != b}
+
+    def changes(self, target: 'SkinSettings') -> 'SkinSettings':
+        """
+        Gets what applying other settings to a skin with these would change
+
+        :param target: The settings to apply
+        :return: The SkinSettings of target that differ from these
+        """
+        return SkinSettings(**{name: b for name, (a, b) in self.diff(target).items() if b is not UNSET})
+
+    def edits(self, target: 'SkinSettings') -> dict:
+        """
+        Gets the text files that applying other settings to a skin with these
+        has to edit, and no others
+
+        :param target: The settings to apply
+        :return: A dict of the paths of the files, relative to the skin root, to the names of the
+            settings to change in each.  Settings kept outside text files, such as square avatars,
+            are under None.
+        """
+        edits = {}
+        for name in self.changes(target).to_profile():
+            for path in [os.path.join(*x) for x in SETTING_FILES[name]] or [None]:
+                edits.setdefault(path, []).append(name)
+        return edits
@@ -0,0 +1,200 @@
+"""
+A terminal screen drawn with ANSI escape codes.  Each frame is compared to
+the last one and only the lines that changed are rewritten, in a single
+write, so moving through a menu repaints two lines instead of the screen.
+"""
+import os
+import shutil
+import sys
+
+# key names returned by Screen.read_key for the escape sequences of special keys
+_KEYS = {
+    b'\x1b[A': 'up',
+    b'\x1bOA': 'up',
+    b'\x1b[B': 'down',
+    b'\x1bOB': 'down',
+    b'\x1b[H': 'home',
+    b'\x1b[1~': 'home',
+    b'\x1b[F': 'end',
+    b'\x1b[4~': 'end',
+    b'\r': 'enter',
+    b'\n': 'enter',
+}
+
+
+def supported() -> bool:
+    """
+    Checks if the terminal can be drawn on directly
+
+    :return: True if both ends of the terminal are interactive and support ANSI codes
+    """
+    if os.name == 'nt' or os.environ.get('TERM') in (None, '', 'dumb'):
+        return False
+    return sys.stdin.isatty() and sys.stdout.isatty()
+
+
+class Screen:
+    """
+    The lines on the terminal, as last drawn.  Rows are counted from the
+    top of the screen, which is cleared once when the first frame is drawn.
+    """
+
+    def __init__(self, stdin=None, stdout=None):
+        """
+        Creates a screen on a terminal
+
+        :param stdin: The terminal to read keys from, defaults to standard input
+        :param stdout: The terminal to draw on, defaults to standard output
+        """
+        self.stdin = stdin if stdin is not None else sys.stdin
+        self.stdout = stdout if stdout is not None else sys.stdout
+        # None until the screen has been cleared
+        self.lines = None
+        # if rows below the frame were written outside of draw
+        self.dirty = False
+
+    def width(self) -> int:
+        """
+        Gets the number of columns a line may use without wrapping
+
+        :return: The width of the terminal, less one
+        """
+        try:
+            columns = os.get_terminal_size(self.stdout.fileno()).columns
+        except (OSError, ValueError):
+            columns = 0
+        # a terminal that doesn't report its size is taken to be 80 columns
+        return (columns or 80) - 1
+
+    def height(self) -> int:
+        """
+        Gets the number of rows a frame may use, leaving the bottom row for the cursor
+
+        :return: The height of the terminal, less one
+        """
+        return max(shutil.get_terminal_size().lines - 1, 1)
+
+    def draw(self, lines: list, selected: int = None):
+        """
+        Shows a frame, rewriting only the lines that differ from the last one
+
+        :param lines: The lines of the frame
+        :param selected: The row shown in reverse video, if any
+        :return: returns nothing
+        """
+        width = self.width()
+        # rows past the bottom of the terminal would be drawn over the last one
+        lines = [(x[:width], row == selected) for row, x in enumerate(lines[:self.height()])]
+
+        out = []
+        if self.lines is None:
+            out.append('\x1b[H\x1b[2J')
+            self.lines = []
+        for row, (line, reverse) in enumerate(lines):
+            if row >= len(self.lines) or self.lines[row] != (line, reverse):
+                out.append('\x1b[{};1H{}{}\x1b[0m\x1b[K'.format(row + 1, '\x1b[7m' if reverse else '', line))
+        if len(lines) < len(self.lines) or self.dirty:
+            out.append('\x1b[{};1H\x1b[J'.format(len(lines) + 1))
+        out.append('\x1b[{};1H'.format(len(lines) + 1))
+
+        self.lines = lines
+        self.dirty = False
+        self.stdout.write(''.join(out))
+        self.stdout.flush()
+
+    def clear(self):
+        """
+        Forgets the frame, so the next one is drawn on a cleared screen
+
+        :return: returns nothing
+        """
+        self.lines = None
+
+    def ask(self, prompt: str, error: str = None) -> str:
+        """
+        Reads a line of text below the frame, echoing it as it is typed
+
+        :param prompt: The text shown before the answer
+        :param error: A message shown above the prompt, such as why the last answer was refused
+        :return: The line entered, without the newline
+        """
+        row = len(self.lines or []) + 1
+        self.stdout.write('\x1b[{};1H\x1b[J{}\x1b[{};1H'.format(row, error or '', row + 1))
+        self.stdout.flush()
+        self.dirty = True
+        return input(prompt)
+
+    def read_key(self) -> str:
+        """
+        Waits for a key press.  The terminal must already be in cbreak mode.
+
+        :return: The name of a special key, such as 'up' or 'enter', otherwise the character typed
+        """
+        import select
+
+        fd = self.stdin.fileno()
+        data = os.read(fd, 1)
+        if data == b'\x1b':
+            # the rest of an escape sequence arrives with it
+            while select.select([fd], [], [], 0.03)[0]:
+                data += os.read(fd, 1)
+                if data[-1:].isalpha() or data[-1:] == b'~':
+                    break
+        return _KEYS.get(data, data.decode(errors='replace'))
+
+    def select(self, header: list, options: list, prompt: str, current: int = 0) -> int:
+        """
+        Lets the user pick an option with the arrow keys, or by typing its number, then enter
+
+        :param header: The lines shown above the options
+        :param options: The names of the options
+        :param prompt: The line shown below the options
+        :param current: The option highlighted at first
+        :return: The index of the option chosen
+        """
+        import termios
+        import tty
+
+        if not options:
+            raise ValueError('There are no options to choose from')
+
+        fd = self.stdin.fileno()
+        saved = termios.tcgetattr(fd)
+        typed = ''
+        # the first option shown, when there are more than fit below the header
+        top = 0
+        self.stdout.write('\x1b[?25l')
+        try:
+            tty.setcbreak(fd)
+            while True:
+                # scroll just far enough to keep the current option in view
+                rows = max(self.height() - len(header) - 2, 1)
+                top = min(max(top, current - rows + 1), current)
+                lines = list(header)
+                for x in range(top, min(top + rows, len(options))):
+                    lines.append('{:4} --> {}'.format(x, options[x]))
+                lines.append('')
+                lines.append('{}{}'.format(prompt, typed))
+                self.draw(lines, len(header) + current - top)
+
+                key = self.read_key()
+                if key == 'enter':
+                    return current
+                elif key == 'up':
+                    current = (current - 1) % len(options)
+                elif key == 'down':
+                    current = (current + 1) % len(options)
+                elif key == 'home':
+                    current = 0
+                elif key == 'end':
+                    current = len(options) - 1
+                elif key.isdigit():
+                    typed = typed + key if int(typed + key) < len(options) else key
+                    if int(typed) < len(options):
+                        current = int(typed)
+                    continue
+                typed = ''
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+            self.stdout.write('\x1b[?25h')
+            self.stdout.flush()
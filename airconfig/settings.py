@@ -0,0 +1,916 @@
+"""
+The settings of the skin, and applying them without prompting.
+"""
+import os
+from pathlib import Path
+
+from . import journal
+from .catalog import get_colors, get_themes
+from .document import SCALAR_SETTINGS, SkinFiles, patch_scalar, scalar_fits
+from .files import (activate_variant, copy_dir, link_dir, load_variants, move_file, save_variants, state_dir,
+                    theme_links, unlink_dir)
+from .instrument import instrumented
+
+
+NOTIFY_POSITIONS = [
+    ('Bottom right', 'BottomRight'),
+    ('Bottom left', 'BottomLeft'),
+    ('Top right', 'TopRight'),
+    ('Top left', 'TopLeft'),
+]
+
+# the avatar borders that square avatars replace
+AVATAR_FILES = [
+    'avatarBorderInGame.tga',
+    'avatarBorderOffline.tga',
+    'avatarBorderOnline.tga',
+    'avatarBorderOverlay.tga',
+    'avatarBorderNotificationDesktop.tga',
+    'avatarBorderNotificationOverlay.tga',
+    'avatarBorderNotification.tga',
+]
+
+
+def set_theme_files(files: SkinFiles, new_theme: str):
+    """
+    Installs the files of a theme, by copying or linking them into place,
+    see THEME_LINKS, without activating it in the config
+
+    :param files: The files of the skin
+    :param new_theme: The name of the theme
+    :return: returns nothing
+    """
+    theme_dir = str(files.skin / '+Extras' / 'Themes' / new_theme)
+    links = state_dir(files.skin) / 'links.json'
+    mode = theme_links(links)
+    if mode == 'copy':
+        unlink_dir(str(files.skin), links)
+        copy_dir(theme_dir, str(files.skin), state_dir(files.skin) / 'copies.json')
+    else:
+        link_dir(theme_dir, str(files.skin), links, mode)
+
+
+@instrumented('edit')
+def set_theme(files: SkinFiles, new_theme: str):
+    """
+    Installs a theme and activates it in the config.  Must be applied before
+    any other file of the skin is read, as the theme may overwrite them.
+
+    :param files: The files of the skin
+    :param new_theme: The name of the theme
+    :return: returns nothing
+    """
+    set_theme_files(files, new_theme)
+    _activate_theme(files, new_theme)
+
+
+def _activate_theme(files: SkinFiles, new_theme: str):
+    """
+    Activates a theme in the config, without installing its files
+
+    :param files: The files of the skin
+    :param new_theme: The name of the theme
+    :return: returns nothing
+    """
+    config = files.document('config.ini')
+
+    # get theme specific lines
+    idxs = [i for i in config.find_all('prop', 'include') if 'resource/themes' in config[i]]
+
+    # set new theme
+    for i in idxs:
+        if not config[i].startswith('//', 4):
+            config[i] = config[i][:4] + '//' + config[i][4:]
+
+        if new_theme.lower() in config[i]:
+            config[i] = config[i].replace('//', '', 1)
+
+
+def get_color(files: SkinFiles) -> str:
+    """
+    Gets the color scheme currently activated in the config
+
+    :param files: The files of the skin
+    :return: The color name, or an empty string if none is active
+    """
+    config = files.document('config.ini')
+
+    color = ""
+    for i in config.find_all('prop', 'include'):
+        if 'resource/colors' in config[i] and '//' not in config[i]:
+            start = config[i].rfind('/') + 1
+            color = config[i][start:config[i].find('.styles', start)]
+
+    return color
+
+
+@instrumented('edit')
+def set_color(files: SkinFiles, new_color: str):
+    """
+    Activates a color scheme in the config
+
+    :param files: The files of the skin
+    :param new_color: The name of the color scheme
+    :return: returns nothing
+    """
+    config = files.document('config.ini')
+
+    # get color specific lines
+    idxs = [i for i in config.find_all('prop', 'include') if 'resource/colors' in config[i]]
+
+    # set new color
+    for i in idxs:
+        if '//' not in config[i]:
+            config[i] = config[i][:4] + '//' + config[i][4:]
+
+        if new_color in config[i]:
+            config[i] = config[i].replace('//', '')
+
+
+def get_chat_font_size(files: SkinFiles):
+    """
+    Gets the font size of chat
+
+    :param files: The files of the skin
+    :return: The font size, or None if the default is used
+    """
+    fonts = files.document('Resource', 'styles', '_fonts.styles')
+
+    idx = fonts.find('block', 'ChatListPanel RichText')
+    start = fonts[idx].find('font-size=')
+
+    if fonts[idx].startswith('//') or start < 0:
+        return None
+    return int(fonts[idx][start + len('font-size='):].split()[0])
+
+
+@instrumented('edit')
+def set_chat_font_size(files: SkinFiles, new_size):
+    """
+    Sets the font size of chat
+
+    :param files: The files of the skin
+    :param new_size: The new font size, or None to reset to default
+    :return: returns nothing
+    """
+    fonts = files.document('Resource', 'styles', '_fonts.styles')
+
+    # get correct line
+    idx = fonts.find('block', 'ChatListPanel RichText')
+
+    if new_size is None:
+        # comment line
+        if not fonts[idx].startswith('//'):
+            fonts[idx] = '//' + fonts[idx]
+        return
+
+    # uncomment line
+    if fonts[idx].startswith('//'):
+        fonts[idx] = fonts[idx][2:]
+
+    # add font size
+    fonts[idx] = fonts[idx][:fonts[idx].find('{') + 1] + ' font-size={} '.format(new_size) + fonts[idx][
+                                                                                             fonts[idx].find('}'):]
+
+
+def get_notify_pos(files: SkinFiles) -> str:
+    """
+    Gets the position of desktop notifications
+
+    :param files: The files of the skin
+    :return: One of the position values in NOTIFY_POSITIONS
+    """
+    styles = files.document('Resource', 'styles', 'steam.styles')
+
+    idx = styles.find('prop', 'Notifications.PanelPosition')
+
+    qopen = styles[idx].find('"') + 1
+    return styles[idx][qopen:styles[idx].find('"', qopen)]
+
+
+@instrumented('edit')
+def set_notify_pos(files: SkinFiles, position: str):
+    """
+    Sets the position of desktop notifications
+
+    :param files: The files of the skin
+    :param position: One of the position values in NOTIFY_POSITIONS
+    :return: returns nothing
+    """
+    styles = files.document('Resource', 'styles', 'steam.styles')
+
+    # get correct line
+    idxs = styles.find_all('prop', 'Notifications.PanelPosition')
+
+    for idx in idxs:
+        qopen = styles[idx].find('"') + 1
+        styles[idx] = styles[idx][:qopen] + position + styles[idx][styles[idx].find('"', qopen):]
+
+
+def get_notify_stack(files: SkinFiles) -> int:
+    """
+    Gets the number of notifications shown in a stack
+
+    :param files: The files of the skin
+    :return: The stack size
+    """
+    styles = files.document('Resource', 'styles', 'steam.styles')
+
+    idx = styles.find('prop', 'Notifications.StackSize')
+
+    qopen = styles[idx].find('"') + 1
+    return int(styles[idx][qopen:styles[idx].find('"', qopen)])
+
+
+@instrumented('edit')
+def set_notify_stack(files: SkinFiles, new_size: int):
+    """
+    Sets the number of notifications shown in a stack
+
+    :param files: The files of the skin
+    :param new_size: The new stack size
+    :return: returns nothing
+    """
+    styles = files.document('Resource', 'styles', 'steam.styles')
+
+    # get correct line
+    idx = styles.find('prop', 'Notifications.StackSize')
+
+    qopen = styles[idx].find('"') + 1
+    styles[idx] = styles[idx][:qopen] + str(new_size) + styles[idx][styles[idx].find('"', qopen):]
+
+
+def get_detail_order(files: SkinFiles) -> list:
+    """
+    Gets the current order of the sections of the detail view
+
+    :param files: The files of the skin
+    :return: A list of section names
+    """
+    layout = files.document('Resource', 'layout', 'steamrootdialog_gamespage_details.layout')
+
+    idx = layout.find('control', 'welcomedetails')
+
+    return layout[idx][layout[idx].find('=') + 1:-1].split(',')
+
+
+@instrumented('edit')
+def set_detail_order(files: SkinFiles, items: list):
+    """
+    Sets the order of the sections of the detail view
+
+    :param files: The files of the skin
+    :param items: A list of section names
+    :return: returns nothing
+    """
+    current = get_detail_order(files)
+    if sorted(items) != sorted(current):
+        raise ValueError('Detail order must contain each of: {}'.format(', '.join(current)))
+
+    layout = files.document('Resource', 'layout', 'steamrootdialog_gamespage_details.layout')
+
+    idx = layout.find('control', 'welcomedetails')
+
+    param_start = layout[idx].find('=') + 1
+    layout[idx] = layout[idx][:param_start] + ','.join(items) + '\n'
+
+
+def get_grid_fade(files: SkinFiles) -> int:
+    """
+    Gets the current fade of the games in the grid view
+
+    :param files: The files of the skin
+    :return: The current alpha value, from 0 to 255
+    """
+    styles = files.document('Resource', 'styles', 'steam.styles')
+
+    block = styles.find('block', 'GameItem_Uninstalled GamesGridImage')
+    idx = styles.find('prop', 'alpha', block, styles.block_end(block))
+
+    return int(styles[idx].strip(' \t\nalpha'))
+
+
+@instrumented('edit')
+def set_grid_fade(files: SkinFiles, new_alpha: int):
+    """
+    Sets the fade of the games in the grid view
+
+    :param files: The files of the skin
+    :param new_alpha: The new alpha value, from 0 to 255
+    :return: returns nothing
+    """
+    styles = files.document('Resource', 'styles', 'steam.styles')
+
+    block = styles.find('block', 'GameItem_Uninstalled GamesGridImage')
+    idx = styles.find('prop', 'alpha', block, styles.block_end(block))
+
+    styles[idx] = "      {} {:10}\n".format('alpha', new_alpha)
+
+
+def get_friends_list_shortcut(files: SkinFiles) -> bool:
+    """
+    Checks if the friends list shortcut is enabled
+
+    :param files: The files of the skin
+    :return: If the shortcut is shown
+    """
+    layout = files.document('Resource', 'layout', 'steamrootdialog.layout')
+
+    idx = layout.find('prop', 'height', layout.find('control', 'online_friends'))
+
+    return layout[idx][layout[idx].find('=') + 1:].strip() != '0'
+
+
+@instrumented('edit')
+def set_friends_list_shortcut(files: SkinFiles, enable: bool):
+    """
+    Enables or disables the friends list shortcut
+
+    :param files: The files of the skin
+    :param enable: If the shortcut should be shown
+    :return: returns nothing
+    """
+    layout = files.document('Resource', 'layout', 'steamrootdialog.layout')
+
+    idx1 = layout.find('prop', 'height', layout.find('control', 'online_friends'))
+    idx2 = layout.find('prop', 'height', layout.find('control', 'view_friends'))
+
+    height = '30' if enable else '0'
+
+    layout[idx1] = layout[idx1][:layout[idx1].find('=') + 1] + height + '\n'
+    layout[idx2] = layout[idx2][:layout[idx2].find('=') + 1] + height + '\n'
+
+
+def get_game_filters(files: SkinFiles) -> bool:
+    """
+    Checks if the extra game filters are enabled
+
+    :param files: The files of the skin
+    :return: If the filters dropdown is shown
+    """
+    layout = files.document('Resource', 'layout', 'uinavigatorpanel.layout')
+
+    return 'label_community' not in layout[layout.find('control', 'label_store')]
+
+
+@instrumented('edit')
+def set_game_filters(files: SkinFiles, enable: bool):
+    """
+    Enables or disables the extra game filters
+
+    :param files: The files of the skin
+    :param enable: If the filters dropdown should be shown
+    :return: returns nothing
+    """
+    layout = files.document('Resource', 'layout', 'uinavigatorpanel.layout')
+
+    idx = layout.find('control', 'label_store')
+    filters = layout.find('control', 'library_filters')
+
+    # the later lines are edited first, so idx stays valid
+    if enable:
+        if 'label_community' in layout[idx]:
+            # replace the empty place of the dropdown with its display code
+            layout[filters:filters + 1] = [
+                "    place {\n",
+                "      control=library_filters\n",
+                "      region=nav start=label_library height=30 width=15 x=0 y=7\n",
+                "    }\n",
+                '\n',
+                "    place {\n",
+                "      control=label_community,label_me\n",
+                "      region=nav start=library_filters height=44 spacing=16 x=10 y=0 margin-top=-7\n",
+                "    }\n",
+            ]
+
+            # update code
+            layout[idx] = "      control=label_store,label_library\n"
+    else:
+        if 'label_community' not in layout[idx]:
+            # remove display code, from the dropdown up to the end of the labels following it
+            start = layout.parent(filters)
+            end = layout.block_end(layout.parent(layout.find('control', 'label_community', filters)))
+            layout[start:end + 1] = ["    place { control=library_filters height=0 width=0 margin-left=-9999 }\n"]
+
+            # update code
+            layout[idx] = "      control=label_store,label_library,label_community,label_me\n"
+
+
+def get_wallet_balance(files: SkinFiles) -> bool:
+    """
+    Checks if the wallet balance is shown when empty
+
+    :param files: The files of the skin
+    :return: If the balance is shown
+    """
+    layout = files.document('Resource', 'layout', 'steamrootdialog.layout')
+
+    idx = layout.find('control', 'account_balance')
+
+    param_start = layout[idx].find('height=') + len('height=')
+    return layout[idx][param_start:layout[idx].find(' margin-right')] != '0'
+
+
+@instrumented('edit')
+def set_wallet_balance(files: SkinFiles, show: bool):
+    """
+    Shows or hides the wallet balance when empty
+
+    :param files: The files of the skin
+    :param show: If the balance should be shown
+    :return: returns nothing
+    """
+    height = '30' if show else '0'
+
+    layout = files.document('Resource', 'layout', 'steamrootdialog.layout')
+
+    idx = layout.find('control', 'account_balance')
+
+    param_start = layout[idx].find('height=') + len('height=')
+    param_end = layout[idx].find(' margin-right')
+
+    layout[idx] = layout[idx][:param_start] + height + layout[idx][param_end:]
+
+
+def get_inbox_icon(files: SkinFiles) -> bool:
+    """
+    Checks if the inbox icon is shown when there are no notifications
+
+    :param files: The files of the skin
+    :return: If the icon is always shown
+    """
+    layout = files.document('Resource', 'layout', 'steamrootdialog.layout')
+
+    button = layout.find('block', 'inbox_button')
+    return bool(layout.find_all('block', 'render_bg', button, layout.block_end(button)))
+
+
+@instrumented('edit')
+def set_inbox_icon(files: SkinFiles, show: bool):
+    """
+    Shows or hides the inbox icon when there are no notifications
+
+    :param files: The files of the skin
+    :param show: If the icon should always be shown
+    :return: returns nothing
+    """
+    layout = files.document('Resource', 'layout', 'steamrootdialog.layout')
+
+    button = layout.find('block', 'inbox_button')
+    selected = layout.find('block', 'inbox_button:selected')
+    render = layout.find_all('block', 'render_bg', button, layout.block_end(button))
+
+    if show:
+        if not render:
+            # each block's render_bg goes before its closing brace, the later block's first
+            inserts = {
+                layout.block_end(selected): [
+                    "      render_bg {\n",
+                    "        0=\"image( x0, y0, x1, y1, graphics/onfocus/active_circle )\"\n",
+                    "        1=\"image( x0 + 6, y0 + 6, x1, y1, graphics/onfocus/inbox )\"\n",
+                    "      }\n",
+                ],
+                layout.block_end(button): [
+                    "      render_bg {\n",
+                    "        0=\"image( x0 + 6, y0 + 6, x1, y1, graphics/onfocus/inbox )\"\n",
+                    "      }\n",
+                ],
+            }
+            for idx in sorted(inserts, reverse=True):
+                layout[idx:idx] = inserts[idx]
+    else:
+        if render:
+            found = [layout.find('block', 'render_bg', x, layout.block_end(x)) for x in (selected, button)]
+            for start, end in sorted(((x, layout.block_end(x)) for x in found), reverse=True):
+                del layout[start:end + 1]
+
+
+def get_theme(files: SkinFiles) -> str:
+    """
+    Gets the theme currently activated in the config
+
+    :param files: The files of the skin
+    :return: The capitalized theme name, or an empty string if none is active
+    """
+    config = files.document('config.ini')
+
+    theme = ""
+    for i in config.find_all('prop', 'include'):
+        if 'resource/themes' in config[i] and not config[i].startswith('//', 4):
+            start = config[i].find("_") + 1
+            end = config[i].find(".", start)
+            theme = config[i][start:end]
+
+    return theme[:1].upper() + theme[1:]
+
+
+def get_square_avatars(files: SkinFiles) -> bool:
+    """
+    Checks if square friends avatars are enabled
+
+    :param files: The files of the skin
+    :return: If square avatars are used
+    """
+    variants = load_variants(state_dir(files.skin) / 'avatars')
+    if variants['active'] is None:
+        # enabled before avatar variants were kept
+        return (files.skin / "Graphics" / "avatarBorderOnline.tga.orig").exists()
+    return variants['active'] == 'square'
+
+
+@instrumented('edit')
+def set_square_avatars(files: SkinFiles, enable: bool):
+    """
+    Enables or disables square friends avatars.  The round and square avatar
+    borders are two variants of the same files: the inactive one is kept in
+    the state directory, and switching renames the files of both in one
+    batch that is safe to repeat.
+
+    :param files: The files of the skin
+    :param enable: If square avatars should be used
+    :return: returns nothing
+    """
+    import shutil
+
+    graphics = files.skin / "Graphics"
+    variants_dir = state_dir(files.skin) / 'avatars'
+    variants = load_variants(variants_dir)
+
+    if variants['active'] is None and (graphics / "avatarBorderOnline.tga.orig").exists():
+        # take over the originals set aside before avatar variants were kept
+        (variants_dir / 'round').mkdir(parents=True, exist_ok=True)
+        for name in AVATAR_FILES:
+            if (graphics / (name + '.orig')).exists():
+                move_file(str(graphics / (name + '.orig')), str(variants_dir / 'round' / name))
+        variants.update(active='square', files=AVATAR_FILES)
+        save_variants(variants_dir, variants)
+
+    if not enable:
+        activate_variant(str(graphics), variants_dir, 'round', active='round')
+        return
+
+    theme = get_theme(files)
+    square = variants_dir / 'square'
+    if variants.get('theme') != theme:
+        # set aside the square avatars of the current theme
+        activate_variant(str(graphics), variants_dir, 'round', active='round')
+        if square.exists():
+            shutil.rmtree(str(square))
+        copy_dir(str(files.skin / "+Extras" / "Square Avatars" / theme), str(square))
+
+    activate_variant(str(graphics), variants_dir, 'square', AVATAR_FILES + os.listdir(str(square)),
+                     active='round', theme=theme)
+
+
+def get_friends_hover(files: SkinFiles) -> bool:
+    """
+    Checks if the friends list hover effect is enabled
+
+    :param files: The files of the skin
+    :return: If the hover effect is shown
+    """
+    layout = files.document("Resource", "layout", "friendpanel.layout")
+
+    idx = [i for i in layout.find_all('prop', 'image') if 'graphics/friends/status_mobile_ingame' in layout[i]][0] + 1
+
+    return "CFriendPanel" in layout[idx]
+
+
+@instrumented('edit')
+def set_friends_hover(files: SkinFiles, enable: bool):
+    """
+    Enables or disables the friends list hover effect
+
+    :param files: The files of the skin
+    :param enable: If the hover effect should be shown
+    :return: returns nothing
+    """
+    layout = files.document("Resource", "layout", "friendpanel.layout")
+
+    idx = [i for i in layout.find_all('prop', 'image') if 'graphics/friends/status_mobile_ingame' in layout[i]][0] + 1
+
+    if enable:
+        if "CFriendPanel" not in layout[idx]:
+            layout[idx:idx] = [
+                "        CFriendPanel:selected\n",
+                "            { render_bg { 0=\"fill( x0 - 99, y0, x1, y1, A2Ribbon )\" } }\n",
+            ]
+    else:
+        if "CFriendPanel" in layout[idx]:
+            del layout[idx:idx + 2]
+
+
+def _place_y(line: str, y: int) -> str:
+    """
+    Moves a control placed by a layout line to another y position
+
+    :param line: The place line
+    :param y: The new y position
+    :return: The changed line
+    """
+    start = line.find(' y=')
+    if start == -1:
+        raise ValueError('No y position in {}'.format(line.strip()))
+    start += len(' y=')
+    end = start
+    while end < len(line) and line[end].isdigit():
+        end += 1
+    return line[:start] + str(y) + line[end:]
+
+
+def get_friends_status_lines(files: SkinFiles) -> int:
+    """
+    Gets the number of lines in the friends list status
+
+    :param files: The files of the skin
+    :return: Either 2 or 3
+    """
+    layout = files.document("Resource", "layout", "friendpanel.layout")
+
+    return 2 if "y=9" in layout[layout.find('control', 'NameLabel')] else 3
+
+
+@instrumented('edit')
+def set_friends_status_lines(files: SkinFiles, lines: int):
+    """
+    Sets the number of lines in the friends list status
+
+    :param files: The files of the skin
+    :param lines: Either 2 or 3
+    :return: returns nothing
+    """
+    layout = files.document("Resource", "layout", "friendpanel.layout")
+
+    # the status and game labels are found by name, and the lines placed after
+    # them by where they sit in Air's layout; every line is checked before any
+    # is changed, so a layout that differs is left alone
+    name = layout.find('control', 'NameLabel')
+    status = layout.find('control', 'StatusLabel')
+    game = layout.find('control', 'GameLabel')
+    after = max(status, game) + 1
+    if after + 3 >= len(layout) or "start=" not in layout[after + 3]:
+        raise ValueError('No status image placed after the status labels')
+
+    if lines == 3:
+        if "y=9" in layout[name]:
+            edits = {
+                name: _place_y(layout[name], 3),
+                after: _place_y(layout[after], 31),
+                after + 1: _place_y(layout[after + 1], 31),
+                after + 3: layout[after + 3][:layout[after + 3].find("start=")] + "start=StatusLabel }\n",
+                status: "        place { control=StatusLabel x=53 y=17 }\n",
+            }
+            for idx, line in edits.items():
+                layout[idx] = line
+            # the game label gets a line of its own, after the status label's
+            game_line = "        place { control=GameLabel x=53 y=31 }\n"
+            if game == status:
+                layout[status + 1:status + 1] = [game_line]
+            else:
+                layout[game] = game_line
+    else:
+        if "y=3" in layout[name]:
+            edits = {
+                name: _place_y(layout[name], 9),
+                after: _place_y(layout[after], 25),
+                after + 1: _place_y(layout[after + 1], 25),
+                after + 3: layout[after + 3][:layout[after + 3].find("start=")] + "start=GameLabel x=8 }\n",
+                status: "        place { control=StatusLabel,GameLabel x=53 y=25 spacing=8 }\n",
+            }
+            for idx, line in edits.items():
+                layout[idx] = line
+            if game != status:
+                del layout[game]
+
+
+def get_downloads_icon(files: SkinFiles) -> bool:
+    """
+    Checks if the downloads icon is always shown
+
+    :param files: The files of the skin
+    :return: If the icon is always shown
+    """
+    layout = files.document("Resource", "layout", "uistatuspanel.layout")
+
+    panel = layout.find('block', 'CUIStatusPanel')
+    end = layout.block_end(panel)
+
+    # the icon is always shown when rendered before the background color
+    return layout.find('block', 'render', panel, end) < layout.find('prop', 'bgcolor', panel, end)
+
+
+@instrumented('edit')
+def set_downloads_icon(files: SkinFiles, enable: bool):
+    """
+    Enables or disables the always on downloads icon
+
+    :param files: The files of the skin
+    :param enable: If the icon should always be shown
+    :return: returns nothing
+    """
+    layout = files.document("Resource", "layout", "uistatuspanel.layout")
+
+    panel = layout.find('block', 'CUIStatusPanel')
+    end = layout.block_end(panel)
+    render = layout.find('block', 'render', panel, end)
+    bgcolor = layout.find('prop', 'bgcolor', panel, end)
+
+    # the icon is always shown when rendered before the background color,
+    # and the later lines are edited first so the earlier ones stay put
+    if enable:
+        if render > bgcolor:
+            del layout[render:layout.block_end(render) + 1]
+            layout[panel + 1:panel + 1] = [
+                "\t\t\trender {\n",
+                "\t\t\t\t0=\"image( x0, y0, x1, y1, graphics/material/download )\"\n",
+                "\t\t\t}\n",
+            ]
+    else:
+        if render < bgcolor:
+            layout[bgcolor + 1:bgcolor + 1] = [
+                "\t\t\trender {\n",
+                "\t\t\t\t0=\"image( x0, y0 - 78, x1, y1, graphics/material/download )\"\n",
+                "\t\t\t}\n",
+            ]
+            del layout[render:layout.block_end(render) + 1]
+
+
+def get_status(skin: Path, executor=None) -> dict:
+    """
+    Reads the current value of every setting.  Each file is read once.
+    Parsing holds the GIL, so for the few small files of a skin reading
+    them in turn is faster than on threads; an executor only pays off when
+    the reads themselves are slow, as on a network file system.
+
+    :param skin: Path to the skin root
+    :param executor: The concurrent.futures Executor to read the files on, or None to read them in turn
+    :return: A dict of setting names to values, in the form of a profile
+    """
+    files = SkinFiles(skin)
+    files.preload(STATUS_FILES, executor)
+    return {name: getter(files) for name, getter in STATUS_SETTINGS.items()}
+
+
+@instrumented('apply')
+def apply_profile(skin: Path, profile: dict):
+    """
+    Applies every setting of a profile to the skin in a single pass.  Each
+    file is read once and all edits are made in memory.  Only once they have
+    all succeeded are the theme and avatar files installed, scalars patched
+    in place and each text file that changed written, so a profile that
+    fails leaves the skin alone.
+
+    :param skin: Path to the skin root
+    :param profile: A dict of setting names to values, see PROFILE_SETTINGS
+    :return: A list of the Paths of the text files that changed
+    """
+    from .model import SkinSettings
+
+    if not isinstance(profile, dict):
+        raise ValueError('The profile must be a dict of setting names to values')
+    # the kind and range of every value are checked by the model, which has to read them back
+    SkinSettings.from_profile(profile)
+
+    if 'theme' in profile and profile['theme'] not in get_themes(skin):
+        raise ValueError('Unknown theme: {}'.format(profile['theme']))
+    if 'color' in profile and profile['color'] not in get_colors(skin):
+        raise ValueError('Unknown color: {}'.format(profile['color']))
+
+    files = SkinFiles(skin)
+    if 'detail_order' in profile:
+        current = get_detail_order(files)
+        if sorted(profile['detail_order']) != sorted(current):
+            raise ValueError('Detail order must contain each of: {}'.format(', '.join(current)))
+
+    # a theme that replaces one of the text files edited is installed before they are read
+    early = 'theme' in profile and any((skin / '+Extras' / 'Themes' / profile['theme']).joinpath(*parts).exists()
+                                       for name in profile for parts in SETTING_FILES[name])
+
+    with journal.operation(skin, 'apply_profile'):
+        # the asset settings are recorded for undo only once their files are about to change
+        previous = {}
+        if 'square_avatars' in profile:
+            previous['square_avatars'] = get_square_avatars(files)
+        if 'theme' in profile and get_theme(files):
+            previous['theme'] = get_theme(files)
+        if early:
+            if 'theme' in previous:
+                journal.record_setting(skin, 'theme', previous['theme'])
+            set_theme_files(files, profile['theme'])
+
+        scalars = []
+        for name, setter in PROFILE_SETTINGS.items():
+            if name not in profile:
+                continue
+
+            # asset files are installed once every edit has succeeded
+            if name in ASSET_SETTINGS:
+                if name == 'theme':
+                    _activate_theme(files, profile[name])
+                continue
+
+            # scalars are patched in place at the end, unless their file is rewritten anyway
+            if name in SCALAR_SETTINGS and not files.loaded(*SCALAR_SETTINGS[name][0]) and \
+                    scalar_fits(skin, name, profile[name]):
+                scalars.append(name)
+                continue
+
+            setter(files, profile[name])
+
+        # a later setting may have loaded the file of a scalar after all
+        for name in [x for x in scalars if files.loaded(*SCALAR_SETTINGS[x][0])]:
+            scalars.remove(name)
+            PROFILE_SETTINGS[name](files, profile[name])
+
+        for name, setter in ASSET_SETTINGS.items():
+            if name in profile and not (name == 'theme' and early):
+                if name in previous:
+                    journal.record_setting(skin, name, previous[name])
+                setter(files, profile[name])
+
+        patched = []
+        for name in scalars:
+            changed = patch_scalar(skin, name, profile[name])
+            if changed is None:
+                # the file changed since it was checked
+                PROFILE_SETTINGS[name](files, profile[name])
+            elif changed and skin.joinpath(*SCALAR_SETTINGS[name][0]) not in patched:
+                patched.append(skin.joinpath(*SCALAR_SETTINGS[name][0]))
+
+        return patched + [x for x in files.save() if x not in patched]
+
+
+PROFILE_SETTINGS = {
+    'theme': set_theme,
+    'color': set_color,
+    'chat_font_size': set_chat_font_size,
+    'notify_position': set_notify_pos,
+    'notify_stack': set_notify_stack,
+    'detail_order': set_detail_order,
+    'grid_fade': set_grid_fade,
+    'friends_list_shortcut': set_friends_list_shortcut,
+    'game_filters': set_game_filters,
+    'wallet_balance': set_wallet_balance,
+    'inbox_icon': set_inbox_icon,
+    'square_avatars': set_square_avatars,
+    'friends_hover': set_friends_hover,
+    'friends_status_lines': set_friends_status_lines,
+    'downloads_icon': set_downloads_icon,
+}
+
+
+# the getters of the settings, in the same order as PROFILE_SETTINGS
+STATUS_SETTINGS = {
+    'theme': get_theme,
+    'color': get_color,
+    'chat_font_size': get_chat_font_size,
+    'notify_position': get_notify_pos,
+    'notify_stack': get_notify_stack,
+    'detail_order': get_detail_order,
+    'grid_fade': get_grid_fade,
+    'friends_list_shortcut': get_friends_list_shortcut,
+    'game_filters': get_game_filters,
+    'wallet_balance': get_wallet_balance,
+    'inbox_icon': get_inbox_icon,
+    'square_avatars': get_square_avatars,
+    'friends_hover': get_friends_hover,
+    'friends_status_lines': get_friends_status_lines,
+    'downloads_icon': get_downloads_icon,
+}
+
+# the setters of what settings keep in asset files rather than text, which the journal puts back itself
+ASSET_SETTINGS = {
+    'theme': set_theme_files,
+    'square_avatars': set_square_avatars,
+}
+
+# the files the getters read
+STATUS_FILES = [
+    ('config.ini',),
+    ('Resource', 'styles', '_fonts.styles'),
+    ('Resource', 'styles', 'steam.styles'),
+    ('Resource', 'layout', 'steamrootdialog_gamespage_details.layout'),
+    ('Resource', 'layout', 'steamrootdialog.layout'),
+    ('Resource', 'layout', 'uinavigatorpanel.layout'),
+    ('Resource', 'layout', 'friendpanel.layout'),
+    ('Resource', 'layout', 'uistatuspanel.layout'),
+]
+
+# the text files each setting edits, in the same order as PROFILE_SETTINGS
+SETTING_FILES = {
+    'theme': [('config.ini',)],
+    'color': [('config.ini',)],
+    'chat_font_size': [('Resource', 'styles', '_fonts.styles')],
+    'notify_position': [('Resource', 'styles', 'steam.styles')],
+    'notify_stack': [('Resource', 'styles', 'steam.styles')],
+    'detail_order': [('Resource', 'layout', 'steamrootdialog_gamespage_details.layout')],
+    'grid_fade': [('Resource', 'styles', 'steam.styles')],
+    'friends_list_shortcut': [('Resource', 'layout', 'steamrootdialog.layout')],
+    'game_filters': [('Resource', 'layout', 'uinavigatorpanel.layout')],
+    'wallet_balance': [('Resource', 'layout', 'steamrootdialog.layout')],
+    'inbox_icon': [('Resource', 'layout', 'steamrootdialog.layout')],
+    'square_avatars': [],
+    'friends_hover': [('Resource', 'layout', 'friendpanel.layout')],
+    'friends_status_lines': [('Resource', 'layout', 'friendpanel.layout')],
+    'downloads_icon': [('Resource', 'layout', 'uistatuspanel.layout')],
+}
@@ -0,0 +1,198 @@
+"""
+A content-addressed store of skin assets, shared by every skin on the host.
+Each unique file is kept once, named by its hash, and skins reference it
+through hardlinks.  A blob's link count is its reference count, so blobs
+that no skin links to any more are found without a separate registry.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from . import instrument
+from .files import file_hash
+
+
+def get_store_dir() -> Path:
+    """
+    Gets the default store directory, next to the Steam skins on most systems
+
+    :return: The Path of the store
+    """
+    return Path(os.environ.get('XDG_DATA_HOME', '~/.local/share')).expanduser() / 'air-config' / 'store'
+
+
+class Store:
+    """
+    The blobs of a store, and an index of the hashes of the files added to it
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.objects = path / 'objects'
+        self._index = None
+        self._changed = False
+
+    def _load_index(self) -> dict:
+        """
+        Loads the index of known hashes on first use
+
+        :return: A dict of 'device:inode' to [size, mtime_ns, hash]
+        """
+        if self._index is None:
+            try:
+                with (self.path / 'index.json').open() as file:
+                    self._index = json.load(file)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def save(self):
+        """
+        Writes out the index if it changed, replacing the old file in one step
+
+        :return: returns nothing
+        """
+        if not self._changed:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        temp = self.path / 'index.json.{}.tmp'.format(os.getpid())
+        with temp.open('w') as file:
+            json.dump(self._index, file)
+        os.replace(str(temp), str(self.path / 'index.json'))
+        self._changed = False
+
+    def blob(self, digest: str) -> Path:
+        """
+        Gets the path of a blob
+
+        :param digest: The hash of the contents
+        :return: The Path of the blob, which may not exist
+        """
+        return self.objects / digest[:2] / digest[2:]
+
+    def hash(self, path: str) -> str:
+        """
+        Hashes a file, reusing the hash of an unchanged file or of another link to it
+
+        :param path: The file
+        :return: The hex digest of the contents
+        """
+        stat = os.stat(path)
+        key = '{}:{}'.format(stat.st_dev, stat.st_ino)
+        index = self._load_index()
+        entry = index.get(key)
+        if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+
+        digest = file_hash(path)
+        index[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        self._changed = True
+        return digest
+
+    def add(self, path: str) -> str:
+        """
+        Adds a file to the store, copying it only if its contents aren't there yet
+
+        :param path: The file to add
+        :return: The hash the blob is stored under
+        """
+        import shutil
+
+        digest = self.hash(path)
+        blob = self.blob(digest)
+        if blob.exists():
+            return digest
+
+        start = time.perf_counter()
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        temp = blob.with_name('{}.{}.{}.tmp'.format(blob.name, os.getpid(), threading.get_ident()))
+        shutil.copyfile(path, str(temp))
+        os.chmod(str(temp), 0o444)
+        try:
+            # another process may store the same contents at the same time
+            os.link(str(temp), str(blob))
+        except FileExistsError:
+            pass
+        os.remove(str(temp))
+
+        stat = blob.stat()
+        self._load_index()['{}:{}'.format(stat.st_dev, stat.st_ino)] = [stat.st_size, stat.st_mtime_ns, digest]
+        self._changed = True
+        if instrument.recorder is not None:
+            instrument.recorder.record('store', str(blob), time.perf_counter() - start, stat.st_size)
+        return digest
+
+    def link(self, digest: str, dst_file: str) -> bool:
+        """
+        Puts a stored blob in place, as a hardlink
+
+        :param digest: The hash of the blob
+        :param dst_file: Where to put it, replacing any file there
+        :return: If the file was replaced
+        """
+        import shutil
+
+        blob = str(self.blob(digest))
+        if os.path.exists(dst_file) and os.path.samefile(blob, dst_file):
+            return False
+
+        start = time.perf_counter()
+        temp = '{}.{}.tmp'.format(dst_file, os.getpid())
+        try:
+            os.link(blob, temp)
+        except OSError:
+            # the store is on another filesystem
+            shutil.copyfile(blob, temp)
+        os.replace(temp, dst_file)
+        if instrument.recorder is not None:
+            instrument.recorder.record('link', dst_file, time.perf_counter() - start)
+        return True
+
+    def dedupe(self, root: str) -> int:
+        """
+        Replaces every file under a directory with a link to the store.  The
+        configurator's own state directories are left alone.
+
+        :param root: The directory, such as a skin root
+        :return: The number of bytes freed, counting files that were the last link to their contents
+        """
+        freed = 0
+        for src_dir, dirs, files in os.walk(root):
+            dirs[:] = [x for x in dirs if x != '.air-config']
+            for name in files:
+                path = os.path.join(src_dir, name)
+                if os.path.islink(path):
+                    continue
+                stat = os.stat(path)
+                if self.link(self.add(path), path) and stat.st_nlink == 1:
+                    freed += stat.st_size
+        self.save()
+        return freed
+
+    def gc(self) -> tuple:
+        """
+        Removes the blobs that no skin links to any more
+
+        :return: A tuple of the number of blobs removed and the bytes freed
+        """
+        removed, freed = 0, 0
+        if not self.objects.exists():
+            return removed, freed
+
+        for blob in self.objects.glob('*/*'):
+            stat = blob.stat()
+            if stat.st_nlink == 1:
+                os.remove(str(blob))
+                removed += 1
+                freed += stat.st_size
+
+        # forget the hashes of the files that are gone
+        index = self._load_index()
+        for key in list(index):
+            if not self.blob(index[key][2]).exists():
+                del index[key]
+                self._changed = True
+        self.save()
+        return removed, freed
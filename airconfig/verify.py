@@ -0,0 +1,119 @@
+"""
+Checking a skin against the profile it should have.  An index of the files
+the settings are kept in holds their stats, a hash of their contents and the
+values read from them, much like git's index: a check stats the files, only
+hashes those whose stats changed, and only reads the settings again from
+files whose contents did.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+from .document import SkinFiles
+from .files import file_hash, state_dir
+from .settings import SETTING_FILES, STATUS_SETTINGS
+from .watch import watched_files
+
+# seconds within which a file changed after its stats were recorded might
+# not show in them, on file systems with coarse timestamps
+VERIFY_RACY = 2.0
+
+
+def load_index(skin: Path) -> dict:
+    """
+    Loads the index of the files of a skin
+
+    :param skin: Path to the skin root
+    :return: A dict of the 'time' the stats were taken, in ns, the 'files' by path relative to
+        the skin root, each [size, mtime_ns, inode, hash], and the 'values' read of each setting
+    """
+    path = skin / '.air-config' / 'verify.json'
+    if not path.exists():
+        return {'time': 0, 'files': {}, 'values': {}}
+    with path.open() as file:
+        return json.load(file)
+
+
+def save_index(skin: Path, index: dict):
+    """
+    Writes the index of the files of a skin, replacing the old file in one step
+
+    :param skin: Path to the skin root
+    :param index: The index, see load_index
+    :return: returns nothing
+    """
+    path = state_dir(skin)
+    with (path / 'verify.json.tmp').open('w') as file:
+        json.dump(index, file)
+    os.replace(str(path / 'verify.json.tmp'), str(path / 'verify.json'))
+
+
+def verify(skin: Path, profile: dict) -> list:
+    """
+    Finds the settings of a skin that differ from a profile.  The index is
+    only written when something changed since the last check.
+
+    :param skin: Path to the skin root
+    :param profile: A dict of setting names to the values they should have
+    :return: A list of (name, expected value, value found, error or None) tuples of the settings
+        that differ or can't be read, in the order of the profile
+    """
+    unknown = set(profile) - set(SETTING_FILES)
+    if unknown:
+        raise ValueError('Unknown profile settings: {}'.format(', '.join(sorted(unknown))))
+
+    index = load_index(skin)
+    start = int(time.time() * 1e9)
+    racy = index['time'] - int(VERIFY_RACY * 1e9)
+    changed, updated = set(), False
+    for path in watched_files(profile):
+        try:
+            stat = os.stat(str(skin / path))
+        except FileNotFoundError:
+            stat = None
+        entry = index['files'].get(path)
+        if stat is None:
+            if entry is not None:
+                del index['files'][path]
+                changed.add(path)
+                updated = True
+            continue
+        stamp = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+        if entry is not None and entry[:3] == stamp and entry[1] < racy:
+            continue
+
+        # the stats changed, or are too recent to tell: look at the contents
+        digest = file_hash(str(skin / path))
+        if entry is None or entry[3] != digest:
+            changed.add(path)
+        index['files'][path] = stamp + [digest]
+        updated = True
+
+    # whatever was read from the files that changed is out of date, whether or not it is checked now
+    for name, parts in SETTING_FILES.items():
+        if name in index['values'] and changed.intersection(os.path.join(*x) for x in parts):
+            del index['values'][name]
+
+    files = SkinFiles(skin)
+    drift = []
+    for name, expected in profile.items():
+        # settings kept outside text files, such as square avatars, aren't indexed and are always read
+        if name in index['values']:
+            found = index['values'][name]
+        else:
+            try:
+                found = STATUS_SETTINGS[name](files)
+            except (OSError, IndexError, KeyError, ValueError) as e:
+                drift.append((name, expected, None, '{}: {}'.format(type(e).__name__, e)))
+                continue
+            if SETTING_FILES[name]:
+                index['values'][name] = found
+                updated = True
+        if found != expected:
+            drift.append((name, expected, found, None))
+
+    if updated:
+        index['time'] = start
+        save_index(skin, index)
+    return drift
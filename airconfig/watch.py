@@ -0,0 +1,310 @@
+"""
+Watching a skin for files rewritten by Steam or an Air update, and putting
+the settings of a profile back into them.  Only the files the profile edits
+are watched, and only the settings stored in a file that changed are
+applied again.  Between changes the watcher sleeps in the kernel, or on
+systems without inotify wakes up to stat a handful of files.
+"""
+import json
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+from . import journal
+from .files import state_dir
+from .settings import SETTING_FILES, apply_profile
+
+# seconds without further changes before a burst of them is acted on
+WATCH_DEBOUNCE = 1.0
+
+# seconds between checks when polling
+WATCH_POLL = 2.0
+
+# inotify event masks, from <sys/inotify.h>
+_IN_MODIFY = 0x2
+_IN_ATTRIB = 0x4
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_IGNORED = 0x8000
+_IN_Q_OVERFLOW = 0x4000
+_IN_ONLYDIR = 0x1000000
+
+_EVENT = struct.Struct('iIII')
+
+
+class Inotify:
+    """
+    An inotify instance, through the C library, watching directories for
+    changes to some of their files
+    """
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        # the watched directories by watch descriptor
+        self.dirs = {}
+
+    def add_watch(self, path: str):
+        """
+        Watches a directory for files being written, replaced or removed
+
+        :param path: The directory
+        :return: returns nothing
+        """
+        import ctypes
+
+        mask = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE |
+                _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed', path)
+        self.dirs[wd] = path
+
+    def read(self) -> tuple:
+        """
+        Reads the events waiting, without blocking if there are none
+
+        :return: A tuple of the set of paths changed, and if the watches must be set up again
+            because a directory went away or events were lost
+        """
+        paths, lost = set(), False
+        while select.select([self.fd], [], [], 0)[0]:
+            data = os.read(self.fd, 65536)
+            pos = 0
+            while pos < len(data):
+                wd, mask, cookie, length = _EVENT.unpack_from(data, pos)
+                pos += _EVENT.size
+                name = data[pos:pos + length].rstrip(b'\0')
+                pos += length
+                if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED | _IN_Q_OVERFLOW):
+                    lost = True
+                elif wd in self.dirs:
+                    paths.add(os.path.join(self.dirs[wd], os.fsdecode(name)))
+        return paths, lost
+
+    def close(self):
+        """
+        Removes every watch
+
+        :return: returns nothing
+        """
+        os.close(self.fd)
+
+
+def load_state(skin: Path) -> dict:
+    """
+    Loads what the watcher last saw of a skin
+
+    :param skin: Path to the skin root
+    :return: A dict of the 'profile' being kept and the 'stamps' of the files when it was last applied
+    """
+    path = state_dir(skin) / 'watch.json'
+    if not path.exists():
+        return {'profile': None, 'stamps': {}}
+    with path.open() as file:
+        return json.load(file)
+
+
+def save_state(skin: Path, state: dict):
+    """
+    Writes what the watcher saw of a skin, replacing the old file in one step
+
+    :param skin: Path to the skin root
+    :param state: The state, see load_state
+    :return: returns nothing
+    """
+    path = state_dir(skin)
+    with (path / 'watch.json.tmp').open('w') as file:
+        json.dump(state, file)
+    os.replace(str(path / 'watch.json.tmp'), str(path / 'watch.json'))
+
+
+def watched_files(profile: dict) -> list:
+    """
+    Gets the files the settings of a profile are kept in
+
+    :param profile: A dict of setting names to values
+    :return: A list of paths relative to the skin root, without duplicates
+    """
+    paths = []
+    for name in profile:
+        for parts in SETTING_FILES[name]:
+            if os.path.join(*parts) not in paths:
+                paths.append(os.path.join(*parts))
+    return paths
+
+
+def _stamps(skin: Path, paths: list) -> dict:
+    """
+    Gets the modification time and size of files
+
+    :param skin: Path to the skin root
+    :param paths: The paths relative to the skin root
+    :return: A dict of each path to [mtime_ns, size], or None if it is missing
+    """
+    stamps = {}
+    for path in paths:
+        try:
+            stat = os.stat(str(skin / path))
+            stamps[path] = [stat.st_mtime_ns, stat.st_size]
+        except FileNotFoundError:
+            stamps[path] = None
+    return stamps
+
+
+def reapply(skin: Path, state: dict) -> tuple:
+    """
+    Applies again the settings of the profile stored in files that changed
+    since it was last applied, then saves the new stamps of the files
+
+    :param skin: Path to the skin root
+    :param state: The state, see load_state
+    :return: A tuple of the names of the settings applied and the Paths of the files written
+    """
+    profile = state['profile']
+    paths = watched_files(profile)
+    stamps = _stamps(skin, paths)
+    changed = [x for x in paths if stamps[x] != state['stamps'].get(x)]
+    # the whole profile is applied the first time, including the settings kept outside text files
+    names = [x for x in profile
+             if not state['stamps'] or any(os.path.join(*y) in changed for y in SETTING_FILES[x])]
+    if not names:
+        return [], []
+
+    with journal.operation(skin, 'watch'):
+        written = apply_profile(skin, {x: profile[x] for x in names})
+    state['stamps'].update(_stamps(skin, paths))
+    save_state(skin, state)
+    return names, written
+
+
+def _wait_inotify(skin: Path, paths: list):
+    """
+    Waits for a burst of changes to the watched files with inotify
+
+    :param skin: Path to the skin root
+    :param paths: The watched paths, relative to the skin root
+    :return: A generator, yielding once after each burst
+    """
+    watched = {str(skin / x) for x in paths}
+    inotify = None
+    started = False
+    try:
+        while True:
+            if inotify is None:
+                inotify = Inotify()
+                try:
+                    for path in sorted({os.path.dirname(x) for x in watched}):
+                        inotify.add_watch(path)
+                except OSError:
+                    inotify.close()
+                    inotify = None
+                    if not started:
+                        raise
+                    # a directory is being replaced, try again once it is back
+                    time.sleep(WATCH_POLL)
+                    continue
+                started = True
+                # anything may have changed while the watches were being set up
+                yield
+
+            select.select([inotify.fd], [], [])
+            changed, lost = inotify.read()
+            if not lost and not changed & watched:
+                continue
+
+            # wait for the writer to finish
+            while select.select([inotify.fd], [], [], WATCH_DEBOUNCE)[0]:
+                more, more_lost = inotify.read()
+                lost = lost or more_lost
+            if lost:
+                # a directory was replaced, or the queue overflowed
+                inotify.close()
+                inotify = None
+                continue
+            yield
+    finally:
+        if inotify is not None:
+            inotify.close()
+
+
+def _wait_poll(skin: Path, paths: list, interval: float):
+    """
+    Waits for a burst of changes to the watched files by checking their stamps
+
+    :param skin: Path to the skin root
+    :param paths: The watched paths, relative to the skin root
+    :param interval: The seconds between checks
+    :return: A generator, yielding once after each burst
+    """
+    last = _stamps(skin, paths)
+    yield
+    while True:
+        time.sleep(interval)
+        stamps = _stamps(skin, paths)
+        if stamps == last:
+            continue
+
+        # wait for the writer to finish
+        while stamps != last:
+            last = stamps
+            time.sleep(WATCH_DEBOUNCE)
+            stamps = _stamps(skin, paths)
+        yield
+
+
+def watch(skin: Path, profile: dict = None, poll: float = None):
+    """
+    Keeps the settings of a profile in a skin, applying them again whenever
+    the files they are stored in are rewritten.  The profile and the stamps
+    of the files are kept in the state directory, so a restarted watcher
+    only applies what changed while it wasn't running.
+
+    :param skin: Path to the skin root
+    :param profile: The profile to keep, defaults to the one last watched
+    :param poll: Check for changes every this many seconds instead of using inotify
+    :return: A generator, yielding a tuple of the names of the settings applied, the Paths of
+        the files written and the error, if any, each time the skin changed
+    """
+    state = load_state(skin)
+    if profile is not None and profile != state['profile']:
+        state = {'profile': profile, 'stamps': {}}
+    if state['profile'] is None:
+        raise ValueError('No profile to watch')
+    unknown = set(state['profile']) - set(SETTING_FILES)
+    if unknown:
+        raise ValueError('Unknown profile settings: {}'.format(', '.join(sorted(unknown))))
+
+    paths = watched_files(state['profile'])
+    if poll is None:
+        try:
+            waits = _wait_inotify(skin, paths)
+            next(waits)
+        except (OSError, AttributeError):
+            # no inotify on this system
+            waits = _wait_poll(skin, paths, WATCH_POLL)
+            next(waits)
+    else:
+        waits = _wait_poll(skin, paths, poll)
+        next(waits)
+
+    while True:
+        try:
+            names, written = reapply(skin, state)
+            if names:
+                yield names, written, None
+        except (OSError, ValueError) as e:
+            # a file half written, or removed for now; applied once it is back
+            yield [], [], '{}: {}'.format(type(e).__name__, e)
+        next(waits)
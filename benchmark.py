@@ -0,0 +1,438 @@
+"""
+Benchmarks for air-configurator.
+
+Generates a synthetic skin shaped like Air for Steam, then drives each
+editor without prompting and reports the wall time, and on Linux the read
+and write syscalls and bytes, of every operation.
+
+    python3 benchmark.py --themes 4 --assets 900 --lines 5000
+"""
+import argparse
+import json
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from airconfig import build, catalog, daemon, document, journal, merge, settings, verify
+from airconfig.files import copy_dir, link_dir, state_dir, unlink_dir
+
+
+def write(path: Path, text: str):
+    """
+    Writes a file, creating its directory as needed
+
+    :param path: The file to write
+    :param text: The contents
+    :return: returns nothing
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def filler(prefix: str, count: int) -> str:
+    """
+    Generates blocks of styles or layout that no editor looks at, to bring
+    the files up to a realistic size
+
+    :param prefix: A name for the generated blocks
+    :param count: The number of lines to generate
+    :return: The generated text
+    """
+    lines = []
+    for i in range(count // 4):
+        lines.append('    {}_{} {{\n'.format(prefix, i))
+        lines.append('      bgcolor=none\n')
+        lines.append('      place {{ control={}_{}_label x=0 y={} }}\n'.format(prefix, i, i % 40))
+        lines.append('    }\n')
+    return ''.join(lines)
+
+
+def make_skin(root: Path, themes: int = 3, colors: int = 12, assets: int = 300,
+              asset_size: int = 8192, lines: int = 2000):
+    """
+    Generates a skin with the files and anchors the editors expect
+
+    :param root: The directory to create the skin in
+    :param themes: The number of themes in +Extras/Themes
+    :param colors: The number of color schemes
+    :param assets: The number of files in each theme
+    :param asset_size: The size of each theme file in bytes
+    :param lines: The number of filler lines in each .styles and .layout file
+    :return: returns nothing
+    """
+    half = lines // 2
+    theme_names = ['Theme{}'.format(x) for x in range(themes)]
+
+    write(root / 'Changelog.url', '[InternetShortcut]\nURL=https://github.com/Outsetini/Air-for-Steam/releases\n')
+
+    for theme in theme_names:
+        for i in range(assets):
+            path = root / '+Extras' / 'Themes' / theme / 'Graphics' / 'dir{}'.format(i % 20) / 'img{}.tga'.format(i)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # the first half of every theme is shared, the rest differs
+            path.write_bytes(bytes([i % 256 if i < assets // 2 else (i + len(theme)) % 256]) * asset_size)
+        for name in ('Online', 'Notification'):
+            write(root / '+Extras' / 'Square Avatars' / theme / 'avatarBorder{}.tga'.format(name), theme * 64)
+
+    for name in ('InGame', 'Offline', 'Online', 'Overlay', 'NotificationDesktop', 'NotificationOverlay'):
+        write(root / 'Graphics' / 'avatarBorder{}.tga'.format(name), 'round' * 64)
+
+    color_names = ['Color{}'.format(x) for x in range(colors)]
+    for color in color_names:
+        write(root / 'Resource' / 'colors' / (color + '.styles'), 'colors {\n' + filler(color, 40) + '}\n')
+    write(root / 'Resource' / 'colors' / 'user' / 'Custom.styles', 'colors {\n}\n')
+
+    config = ['styles\n{\n']
+    for theme in theme_names:
+        config.append('    {}include "resource/themes/_{}.styles"\n'.format(
+            '' if theme == theme_names[0] else '//', theme.lower()))
+    for color in color_names:
+        config.append('    {}include "resource/colors/{}.styles"\n'.format(
+            '' if color == color_names[0] else '//', color))
+    config.append('}\n')
+    write(root / 'config.ini', ''.join(config))
+
+    write(root / 'Resource' / 'styles' / '_fonts.styles',
+          'styles {\n' + filler('Font', half) +
+          '//    ChatListPanel RichText { font-size=16 }\n' +
+          filler('FontEnd', half) + '}\n')
+
+    write(root / 'Resource' / 'styles' / 'steam.styles',
+          'styles {\n' + filler('Steam', half) +
+          '  Notifications.PanelPosition "BottomRight"\n'
+          '  Notifications.StackSize "3"\n'
+          '    GameItem_Uninstalled GamesGridImage {\n'
+          '      alpha        100\n'
+          '    }\n' +
+          filler('SteamEnd', half) + '}\n')
+
+    write(root / 'Resource' / 'layout' / 'steamrootdialog_gamespage_details.layout',
+          'layout {\n' + filler('Details', half) +
+          '      control=welcomedetails,friends,achievements,dlc,news\n' +
+          filler('DetailsEnd', half) + '}\n')
+
+    write(root / 'Resource' / 'layout' / 'steamrootdialog.layout',
+          'layout {\n' + filler('Root', half) +
+          '    place {\n'
+          '      control=online_friends\n'
+          '      height=30\n'
+          '    }\n'
+          '    place {\n'
+          '      control=view_friends\n'
+          '      height=30\n'
+          '    }\n'
+          '    place { control=account_balance height=30 margin-right=10 }\n'
+          '  }\n'
+          '  styles {\n'
+          '    inbox_button {\n'
+          '      bgcolor=none\n'
+          '    }\n'
+          '    inbox_button:selected {\n'
+          '      bgcolor=none\n'
+          '    }\n' +
+          filler('RootEnd', half) + '  }\n')
+
+    write(root / 'Resource' / 'layout' / 'uinavigatorpanel.layout',
+          'layout {\n' + filler('Nav', half) +
+          '    place {\n'
+          '      control=label_store,label_library,label_community,label_me\n'
+          '      region=nav height=44\n'
+          '      spacing=16\n'
+          '    }\n'
+          '    place { control=library_filters height=0 width=0 margin-left=-9999 }\n' +
+          filler('NavEnd', half) + '}\n')
+
+    write(root / 'Resource' / 'layout' / 'friendpanel.layout',
+          'layout {\n' + filler('Friend', half) +
+          '        { image="graphics/friends/status_mobile_ingame" }\n'
+          '        place { control=MobileLabel }\n'
+          '        place { control=NameLabel,FriendsNameInstanceLabel,ClanStatusImage x=53 y=9 spacing=4 }\n'
+          '        place { control=Avatar x=0 y=0 }\n'
+          '        place { control=StatusLabel,GameLabel x=53 y=25 spacing=8 }\n'
+          '        place { control=InGameLabel x=60 y=25 }\n'
+          '        place { control=OnlineLabel x=70 y=25 }\n'
+          '        place { control=Separator }\n'
+          '        place { control=StatusImage start=GameLabel x=8 }\n' +
+          filler('FriendEnd', half) + '}\n')
+
+    write(root / 'Resource' / 'layout' / 'uistatuspanel.layout',
+          '\tstyles {\n' + filler('Status', half) +
+          '\t\tCUIStatusPanel {\n'
+          '\t\t\tbgcolor=none\n'
+          '\t\t\trender {\n'
+          '\t\t\t\t0="image( x0, y0 - 78, x1, y1, graphics/material/download )"\n'
+          '\t\t\t}\n'
+          '\t\t}\n' +
+          filler('StatusEnd', half) + '\t}\n')
+
+
+def io_counters() -> dict:
+    """
+    Reads the I/O counters of this process, on Linux only
+
+    :return: A dict of the counters, or None where they aren't available
+    """
+    try:
+        with open('/proc/self/io') as file:
+            return {key: int(value) for key, value in (line.split(': ') for line in file)}
+    except OSError:
+        return None
+
+
+def measure(func, repeat: int, reset=None) -> dict:
+    """
+    Runs an operation repeatedly and measures it
+
+    :param func: The operation, called with the repetition number
+    :param repeat: The number of times to run it
+    :param reset: A function called before each run, outside the measurement
+    :return: A dict of the timings and mean I/O per run
+    """
+    times = []
+    totals = {'syscr': 0, 'syscw': 0, 'rchar': 0, 'wchar': 0}
+    for i in range(repeat):
+        if reset is not None:
+            reset()
+        before = io_counters()
+        start = time.perf_counter()
+        func(i)
+        times.append(time.perf_counter() - start)
+        after = io_counters()
+        if before is not None and after is not None:
+            for key in totals:
+                totals[key] += after[key] - before[key]
+
+    result = {
+        'runs': repeat,
+        'median_ms': statistics.median(times) * 1000,
+        'min_ms': min(times) * 1000,
+    }
+    if io_counters() is not None:
+        result.update({
+            'read_calls': totals['syscr'] / repeat,
+            'write_calls': totals['syscw'] / repeat,
+            'read_bytes': totals['rchar'] / repeat,
+            'write_bytes': totals['wchar'] / repeat,
+        })
+    return result
+
+
+def run(args) -> dict:
+    """
+    Generates the skin and benchmarks every operation on it
+
+    :param args: The parsed command line
+    :return: A dict of operation names to their measurements
+    """
+    work = Path(tempfile.mkdtemp(prefix='air-bench-'))
+    try:
+        catalog.CATALOG = catalog.Catalog(work / 'catalog.json')
+        skin = work / 'Air'
+        make_skin(skin, args.themes, args.colors, args.assets, args.asset_size, args.lines)
+        themes = catalog.get_themes(skin)
+        release = {x: (skin.joinpath(*x)).read_text().splitlines(True) for x in settings.STATUS_FILES}
+
+        def reset():
+            # drop the in-process caches, as a fresh run would
+            if not args.warm:
+                document._documents.clear()
+                document._offsets.clear()
+                document._lines.clear()
+
+        def edit(setter, value):
+            def operation(i):
+                files = document.SkinFiles(skin)
+                setter(files, value(i))
+                files.save()
+            return operation
+
+        def toggle(i):
+            return i % 2 == 0
+
+        results = {}
+
+        # a fresh interpreter each run, which the caches can't help
+        package_dir = str(Path(__file__).resolve().parent)
+        for name, command in (('startup import', ['-c', 'import airconfig']),
+                              ('startup --version', ['-m', 'airconfig', '--version'])):
+            results[name] = measure(lambda i: subprocess.run([sys.executable] + command, cwd=package_dir, check=True,
+                                                             stdout=subprocess.DEVNULL), args.repeat)
+
+        def full_copy(i):
+            copy_dir(str(skin / '+Extras' / 'Themes' / themes[i % len(themes)]), str(skin))
+        results['copy_dir full'] = measure(full_copy, args.repeat, reset)
+
+        # the same copies on a pool of threads, as with --copy-workers, which pays off on slow or network disks
+        for workers in (4, 8):
+            def parallel_copy(i):
+                copy_dir(str(skin / '+Extras' / 'Themes' / themes[i % len(themes)]), str(skin), workers=workers)
+            results['copy_dir full, {} workers'.format(workers)] = measure(parallel_copy, args.repeat, reset)
+
+        manifest = state_dir(skin) / 'copies.json'
+        copy_dir(str(skin / '+Extras' / 'Themes' / themes[0]), str(skin), manifest)
+
+        def same_theme(i):
+            copy_dir(str(skin / '+Extras' / 'Themes' / themes[0]), str(skin), manifest)
+        results['copy_dir incremental, same theme'] = measure(same_theme, args.repeat, reset)
+
+        def switch_theme(i):
+            copy_dir(str(skin / '+Extras' / 'Themes' / themes[(i + 1) % len(themes)]), str(skin), manifest)
+        results['copy_dir incremental, switch theme'] = measure(switch_theme, args.repeat, reset)
+
+        links = state_dir(skin) / 'links.json'
+        for mode in ('symlink', 'hardlink'):
+            def link_theme(i):
+                link_dir(str(skin / '+Extras' / 'Themes' / themes[(i + 1) % len(themes)]), str(skin), links, mode)
+            results['link_dir {}, switch theme'.format(mode)] = measure(link_theme, args.repeat, reset)
+        results['unlink_dir'] = measure(lambda i: unlink_dir(str(skin), links), 1, reset)
+
+        def lookup(i):
+            doc = document.load_document(skin / 'Resource' / 'styles' / 'steam.styles')
+            doc.find('block', 'GameItem_Uninstalled GamesGridImage')
+        results['load and anchor lookup'] = measure(lookup, args.repeat, reset)
+
+        results['set_theme'] = measure(edit(settings.set_theme, lambda i: themes[i % len(themes)]), args.repeat, reset)
+        results['set_color'] = measure(edit(settings.set_color, lambda i: 'Color{}'.format(i % args.colors)),
+                                       args.repeat, reset)
+        results['set_chat_font_size'] = measure(edit(settings.set_chat_font_size, lambda i: 12 + i % 4),
+                                                args.repeat, reset)
+        results['set_notify_pos'] = measure(
+            edit(settings.set_notify_pos, lambda i: settings.NOTIFY_POSITIONS[i % len(settings.NOTIFY_POSITIONS)][1]),
+            args.repeat, reset)
+        results['set_notify_stack'] = measure(edit(settings.set_notify_stack, lambda i: 1 + i % 9), args.repeat, reset)
+        results['patch_scalar notify_stack'] = measure(
+            lambda i: document.patch_scalar(skin, 'notify_stack', 1 + i % 9), args.repeat, reset)
+        sections = ['welcomedetails', 'friends', 'achievements', 'dlc', 'news']
+        results['set_detail_order'] = measure(edit(settings.set_detail_order, lambda i: sections[::1 - i % 2 * 2]),
+                                              args.repeat, reset)
+        results['set_grid_fade'] = measure(edit(settings.set_grid_fade, lambda i: i % 256), args.repeat, reset)
+        results['patch_scalar grid_fade'] = measure(
+            lambda i: document.patch_scalar(skin, 'grid_fade', i % 256), args.repeat, reset)
+        for name in ('friends_list_shortcut', 'game_filters', 'wallet_balance', 'inbox_icon',
+                     'square_avatars', 'friends_hover', 'downloads_icon'):
+            results['set_' + name] = measure(edit(settings.PROFILE_SETTINGS[name], toggle), args.repeat, reset)
+        results['set_friends_status_lines'] = measure(edit(settings.set_friends_status_lines, lambda i: 3 - i % 2),
+                                                      args.repeat, reset)
+
+        def profile(i):
+            settings.apply_profile(skin, {
+                'theme': themes[i % len(themes)],
+                'color': 'Color{}'.format(i % args.colors),
+                'chat_font_size': 12 + i % 4,
+                'notify_position': settings.NOTIFY_POSITIONS[i % len(settings.NOTIFY_POSITIONS)][1],
+                'notify_stack': 1 + i % 9,
+                'grid_fade': i % 256,
+                'friends_list_shortcut': toggle(i),
+                'game_filters': toggle(i),
+                'wallet_balance': toggle(i),
+                'inbox_icon': toggle(i),
+                'square_avatars': toggle(i),
+                'friends_hover': toggle(i),
+                'friends_status_lines': 3 - i % 2,
+                'downloads_icon': toggle(i),
+            })
+        results['apply_profile'] = measure(profile, args.repeat, reset)
+
+        def status_serial(i):
+            files = document.SkinFiles(skin)
+            for getter in settings.STATUS_SETTINGS.values():
+                getter(files)
+        results['status_serial'] = measure(status_serial, args.repeat, reset)
+        results['get_status'] = measure(lambda i: settings.get_status(skin), args.repeat, reset)
+        with ThreadPoolExecutor(max_workers=len(settings.STATUS_FILES)) as executor:
+            results['get_status threaded'] = measure(lambda i: settings.get_status(skin, executor), args.repeat, reset)
+
+        # once the files are older than the racy window, a clean check only stats them
+        expected = settings.get_status(skin)
+        verify.verify(skin, expected)
+        time.sleep(verify.VERIFY_RACY)
+        verify.verify(skin, expected)
+        results['verify clean'] = measure(lambda i: verify.verify(skin, expected), args.repeat, reset)
+
+        def drifted():
+            reset()
+            settings.apply_profile(skin, {'grid_fade': (expected['grid_fade'] + 1) % 256})
+        results['verify after edit'] = measure(lambda i: verify.verify(skin, expected), args.repeat, drifted)
+
+        if hasattr(socket, 'AF_UNIX'):
+            # a round trip to a daemon, whose caches stay warm whatever --warm says
+            sock = work / 'daemon.sock'
+            server = threading.Thread(target=daemon.serve, args=(sock,))
+            server.start()
+            while not sock.exists():
+                time.sleep(0.01)
+            daemon.call('status', sock, skin=str(skin))
+            results['daemon status'] = measure(lambda i: daemon.call('status', sock, skin=str(skin)), args.repeat)
+            results['daemon set grid_fade'] = measure(
+                lambda i: daemon.call('set', sock, skin=str(skin), setting='grid_fade', value=i % 256), args.repeat)
+            daemon.call('shutdown', sock)
+            server.join()
+
+        def merge_release(i):
+            for parts, base in release.items():
+                # a release that added a line every 50, moving everything after it
+                theirs = []
+                for n, line in enumerate(base):
+                    if n % 50 == 0:
+                        theirs.append('// release {} line {}\n'.format(i, n))
+                    theirs.append(line)
+                merge.merge(parts[-1], base, skin.joinpath(*parts).read_text().splitlines(True), theirs)
+        results['merge'] = measure(merge_release, args.repeat, reset)
+
+        variants = {'v{}'.format(n): {'color': 'Color{}'.format(n % args.colors), 'grid_fade': n} for n in range(8)}
+        results['build 8 variants'] = measure(
+            lambda i: build.build_variants(skin, variants, work / 'variants'), args.repeat, reset)
+
+        def edited():
+            settings.apply_profile(skin, {'color': 'Color1', 'chat_font_size': 15, 'notify_stack': 7,
+                                          'game_filters': False, 'friends_status_lines': 2})
+            reset()
+        settings.apply_profile(skin, {'color': 'Color0', 'chat_font_size': 12, 'notify_stack': 3,
+                                      'game_filters': True, 'friends_status_lines': 3})
+        results['journal undo'] = measure(lambda i: journal.undo(skin), args.repeat, edited)
+        sizes = [x.stat().st_size for x in (state_dir(skin) / 'journal').iterdir()]
+        results['journal undo']['entry_bytes'] = statistics.median(sizes)
+
+        return results
+    finally:
+        shutil.rmtree(str(work))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark air-configurator on a synthetic skin.')
+    parser.add_argument('--themes', type=int, default=3, help='number of themes (default: %(default)s)')
+    parser.add_argument('--colors', type=int, default=12, help='number of color schemes (default: %(default)s)')
+    parser.add_argument('--assets', type=int, default=300, help='files per theme (default: %(default)s)')
+    parser.add_argument('--asset-size', type=int, default=8192, help='bytes per theme file (default: %(default)s)')
+    parser.add_argument('--lines', type=int, default=2000,
+                        help='filler lines per .styles and .layout file (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=10, help='runs of each operation (default: %(default)s)')
+    parser.add_argument('--warm', action='store_true', help='keep the in-process file caches between runs')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+
+    print('{:38} {:>10} {:>10} {:>9} {:>9} {:>12} {:>12}'.format(
+        'operation', 'median ms', 'min ms', 'reads', 'writes', 'read bytes', 'write bytes'))
+    for name, result in results.items():
+        print('{:38} {:10.3f} {:10.3f} {:>9} {:>9} {:>12} {:>12}'.format(
+            name, result['median_ms'], result['min_ms'],
+            *('{:.0f}'.format(result[x]) if x in result else 'n/a'
+              for x in ('read_calls', 'write_calls', 'read_bytes', 'write_bytes'))))
+
+
+if __name__ == '__main__':
+    main()